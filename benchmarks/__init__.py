@@ -0,0 +1 @@
+"""Микробенчмарки горячих путей проектов ya_news и ya_note."""
@@ -0,0 +1,205 @@
+"""
+Синхронные и асинхронные страницы чтения под ASGI.
+
+Приложение Django (yanews.asgi, yanote.asgi) вызывается напрямую,
+без сервера и сети: N конкурентных клиентов запрашивают страницу,
+замеряются запросы в секунду и 99-й перцентиль задержки. Каждый
+проект замеряется в отдельном процессе на временной файловой базе,
+запросы идут от авторизованного пользователя, поэтому кэш страниц
+для анонимных не участвует.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_async_views [--requests 2000]
+    [--concurrency 32]
+
+Чтобы учесть сервер и сеть, то же приложение запускают, например,
+под uvicorn (uvicorn yanews.asgi:application) и нагружают внешним
+инструментом по тем же адресам.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+COMMENTS = 50
+NOTES = 200
+
+
+def fill_news():
+    """Новости с комментариями; пары адресов (синхронный, асинхронный)."""
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from news.models import Comment, News
+
+    user = get_user_model().objects.create(username='Читатель')
+    news_list = News.objects.bulk_create(
+        News(title=f'Новость {i}', text='Текст новости ' * 20)
+        for i in range(10)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news_list[0], author=user, text=f'Комментарий {i}')
+        for i in range(COMMENTS)
+    )
+    News.objects.sync_comment_count()
+    detail_args = (news_list[0].pk,)
+    return user, (
+        (reverse('news:home'), reverse('news:async_home')),
+        (
+            reverse('news:detail', args=detail_args),
+            reverse('news:async_detail', args=detail_args),
+        ),
+    )
+
+
+def fill_notes():
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    user = get_user_model().objects.create(username='Автор')
+    notes = Note.objects.bulk_create(
+        Note(title=f'Заметка {i}', text='Текст', slug=f'note-{i}',
+             author=user)
+        for i in range(NOTES)
+    )
+    slug = (notes[0].slug,)
+    return user, (
+        (reverse('notes:list'), reverse('notes:async_list')),
+        (
+            reverse('notes:detail', args=slug),
+            reverse('notes:async_detail', args=slug),
+        ),
+    )
+
+
+def session_cookie(user):
+    """Заголовок Cookie с сессией вошедшего пользователя."""
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    return f'{settings.SESSION_COOKIE_NAME}={session}'.encode()
+
+
+async def call(application, path, cookie):
+    """
+    Один запрос GET к ASGI-приложению, возвращает статус ответа.
+
+    path может содержать строку запроса: /search/?q=...
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie)],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    request_sent = False
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            # Клиент не отключается: Django отменит ожидание сам.
+            await asyncio.Future()
+        request_sent = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def load(application, path, cookie, total, concurrency):
+    """Запросы в секунду и p99 задержки в миллисекундах."""
+    latencies = []
+    numbers = iter(range(total))
+
+    async def client():
+        for _ in numbers:
+            start = time.perf_counter()
+            status = await call(application, path, cookie)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f'{path} вернул статус {status}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return total / elapsed, p99 * 1000
+
+
+def run_project(project, total, concurrency):
+    """Замер в текущем процессе, печатает строки результата."""
+    from benchmarks.projects import setup_django
+    setup_django(project, PROJECTS[project])
+
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+    from django.core.management import call_command
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['NAME'] = Path(directory) / 'db.sqlite3'
+    settings.ALLOWED_HOSTS = ['localhost', 'testserver']
+    # Журнал SQL-запросов в режиме отладки рос бы весь замер.
+    settings.DEBUG = False
+    call_command('migrate', verbosity=0)
+    fill = fill_news if project == 'ya_news' else fill_notes
+    user, pages = fill()
+    cookie = session_cookie(user)
+    application = get_asgi_application()
+    for urls in pages:
+        for path in urls:
+            asyncio.run(load(application, path, cookie, concurrency, 1))
+            rps, p99 = asyncio.run(
+                load(application, path, cookie, total, concurrency)
+            )
+            print(f'{path:>28} {rps:>10.0f} {p99:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--project', choices=PROJECTS)
+    args = parser.parse_args()
+    if args.project:
+        return run_project(args.project, args.requests, args.concurrency)
+    print(f'Запросов: {args.requests}, клиентов: {args.concurrency}')
+    print(f'{"страница":>28} {"в секунду":>10} {"p99, мс":>10}')
+    for project in PROJECTS:
+        subprocess.run([
+            sys.executable, '-m', 'benchmarks.bench_async_views',
+            '--project', project,
+            '--requests', str(args.requests),
+            '--concurrency', str(args.concurrency),
+        ], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Сравнение поиска запрещённых слов: перебор списка и BannedWordsMatcher.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_banned_words
+"""
+import random
+import timeit
+
+from benchmarks.projects import use_project
+
+use_project('ya_news')
+
+from news.banned_words import BannedWordsMatcher  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+WORD_COUNTS = (10, 1_000, 50_000)
+COMMENT_WORDS = 80
+REPEATS = 200
+
+
+def random_word(rng):
+    return ''.join(rng.choices(ALPHABET, k=rng.randint(5, 12)))
+
+
+def loop_search(words, text):
+    """Прежняя реализация CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def measure(func, repeats):
+    """Среднее время одного вызова в микросекундах."""
+    return timeit.timeit(func, number=repeats) / repeats * 1_000_000
+
+
+def main():
+    rng = random.Random(2024)
+    # Комментарий без запрещённых слов: худший случай, текст
+    # просматривается целиком при любом способе поиска.
+    text = ' '.join(random_word(rng) for _ in range(COMMENT_WORDS))
+    print(f'Длина комментария: {len(text)} символов')
+    print(f'{"слов":>8} {"сборка, мс":>12} {"перебор, мкс":>14} '
+          f'{"один проход, мкс":>17} {"ускорение":>10}')
+    for count in WORD_COUNTS:
+        words = tuple({random_word(rng) + 'щщ' for _ in range(count)})
+        build = measure(lambda: BannedWordsMatcher(words), 1) / 1000
+        matcher = BannedWordsMatcher(words)
+        assert matcher.search(text) is None
+        repeats = max(1, REPEATS * 10 // count)
+        loop = measure(lambda: loop_search(words, text), repeats)
+        single_pass = measure(lambda: matcher.search(text), REPEATS)
+        print(f'{count:>8} {build:>12.1f} {loop:>14.1f} '
+              f'{single_pass:>17.1f} {loop / single_pass:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Поиск по архиву новостей на SQLite FTS5.
+
+Архив заполняется в тестовой базе: новости из случайных слов
+с частотами по закону Ципфа, к части из них одобренные комментарии.
+Замеряется время страницы результатов для самого частого, частого,
+редкого и составного запроса. Если страница самого частого слова
+дольше --budget-ms или не заполнена, бенчмарк завершается с кодом 1.
+
+Запуск из корня репозитория (по умолчанию миллион новостей):
+    python -m benchmarks.bench_news_search [--rows 1000000] [--budget-ms 150]
+"""
+import argparse
+import random
+import sys
+import time
+from itertools import accumulate
+
+from benchmarks.projects import setup_django
+
+setup_django('ya_news', 'yanews.settings')
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from news.search import SearchPage  # noqa: E402
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'ду', 'жи', 'за', 'ки', 'ло', 'ми', 'но', 'пу', 'ра',
+    'се', 'то', 'фа', 'хи', 'це', 'чу', 'ша', 'ён',
+)
+VOCABULARY_SIZE = 50_000
+ZIPF_EXPONENT = 1.0
+COMMENT_SHARE = 0.2
+BATCH_SIZE = 10_000
+# Ранги слов в словаре: самое частое, частое, редкое и пара слов.
+QUERY_RANKS = ((0,), (50,), (20_000,), (3, 40))
+REPEATS = 20
+
+
+def make_vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    vocabulary = sorted(words)
+    rng.shuffle(vocabulary)
+    return vocabulary
+
+
+def text_factory(rng, vocabulary):
+    """Тексты, где частоты слов распределены по закону Ципфа."""
+    weights = [
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, len(vocabulary) + 1)
+    ]
+    cumulative = list(accumulate(weights))
+
+    def random_text(length):
+        return ' '.join(
+            rng.choices(vocabulary, cum_weights=cumulative, k=length)
+        )
+    return random_text
+
+
+def fill(rows, rng, random_text):
+    """Заполняет архив пачками в обход ORM: индекс строят триггеры."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO auth_user (username, password, is_superuser, '
+            "first_name, last_name, email, is_staff, is_active, date_joined) "
+            "VALUES ('reader', '', 0, '', '', '', 0, 1, '2024-01-01')"
+        )
+        author_id = cursor.lastrowid
+        for start in range(1, rows + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE, rows + 1))
+            cursor.executemany(
+                'INSERT INTO news_news (id, title, text, date, '
+                'comment_count, version) VALUES (%s, %s, %s, %s, 0, 1)',
+                [
+                    (pk, random_text(4), random_text(40),
+                     '2024-01-01')
+                    for pk in ids
+                ],
+            )
+            cursor.executemany(
+                'INSERT INTO news_comment (news_id, author_id, text, '
+                "created, submitted, status) "
+                "VALUES (%s, %s, %s, %s, %s, 'approved')",
+                [
+                    (pk, author_id, random_text(15),
+                     '2024-01-01 00:00:00', '2024-01-01 00:00:00')
+                    for pk in ids if rng.random() < COMMENT_SHARE
+                ],
+            )
+
+
+def measure(query, page):
+    """Среднее время страницы результатов в миллисекундах."""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        results = SearchPage(query, page=str(page)).results
+    return (time.perf_counter() - start) / REPEATS * 1000, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    arguments = parser.parse_args()
+    rows = arguments.rows
+    connection.creation.create_test_db(verbosity=0)
+    rng = random.Random(2024)
+    vocabulary = make_vocabulary(rng)
+    start = time.perf_counter()
+    fill(rows, rng, text_factory(rng, vocabulary))
+    print(f'Новостей: {rows}, заполнение с индексом: '
+          f'{time.perf_counter() - start:.0f} с')
+    print(f'{"запрос":>22} {"страница":>9} {"мс":>8} {"найдено":>8}')
+    timings = {}
+    for ranks in QUERY_RANKS:
+        query = ' '.join(vocabulary[rank] for rank in ranks)
+        for page in (1, 10):
+            timings[ranks, page] = measure(query, page)
+            elapsed, found = timings[ranks, page]
+            print(f'{query:>22} {page:>9} {elapsed:>8.1f} {found:>8}')
+    return check_frequent(timings, arguments.budget_ms)
+
+
+def check_frequent(timings, budget_ms):
+    """Страницы самого частого слова полны и укладываются в бюджет."""
+    per_page = settings.NEWS_SEARCH_RESULTS_ON_PAGE
+    failed = False
+    for page in (1, 10):
+        elapsed, found = timings[QUERY_RANKS[0], page]
+        if elapsed > budget_ms or found < per_page:
+            print(f'Самое частое слово, страница {page}: {elapsed:.1f} мс, '
+                  f'{found} из {per_page} -- бюджет {budget_ms:.0f} мс')
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Транслитерация заголовков заметок: pytils slugify и кэш из notes.slugs.
+
+Заголовки повторяются неравномерно, как в живой базе: немногие
+(«Список покупок», «План на неделю») встречаются очень часто,
+большинство -- единожды. Частоты распределены по закону Ципфа.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_slugify
+"""
+import random
+import time
+from functools import lru_cache
+
+from benchmarks.projects import use_project, use_settings
+
+use_project('ya_note')
+use_settings('yanote.settings')
+
+from pytils.translit import slugify  # noqa: E402
+
+from notes.slugs import (  # noqa: E402
+    clear_transliteration_cache, transliterate, transliteration_cache_stats
+)
+
+TITLES = 100_000
+DISTINCT_TITLES = 20_000
+ZIPF_EXPONENT = 1.1
+CACHE_SIZES = (256, 4096, 20_000)
+SUBJECTS = (
+    'Список покупок', 'План на неделю', 'Встреча с командой', 'Идеи',
+    'Отпуск', 'Книги прочитать', 'Рецепт борща', 'Тренировка',
+    'Ремонт на кухне', 'Подарки на день рождения', 'Задачи по работе',
+    'Конспект лекции', 'Фильмы посмотреть', 'Дела на выходные',
+)
+DETAILS = (
+    'срочно', 'в субботу', 'для мамы', 'черновик', 'важное',
+    'к пятнице', 'на потом', 'второй вариант', 'итоги', 'вопросы',
+)
+
+
+def make_titles(rng):
+    """Поток заголовков с частотами по закону Ципфа."""
+    distinct = [rng.choice(SUBJECTS) for _ in range(DISTINCT_TITLES)]
+    distinct = [
+        f'{subject} {rng.choice(DETAILS)} №{number}' if number else subject
+        for number, subject in enumerate(distinct)
+    ]
+    weights = [
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, len(distinct) + 1)
+    ]
+    return rng.choices(distinct, weights=weights, k=TITLES)
+
+
+def measure(func, titles):
+    """Время транслитерации всего потока в миллисекундах."""
+    start = time.perf_counter()
+    for title in titles:
+        func(title)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    titles = make_titles(random.Random(2024))
+    print(f'Заголовков: {len(titles)}, различных: {len(set(titles))}')
+    raw = measure(slugify, titles)
+    print(f'{"кэш":>8} {"время, мс":>10} {"попадания":>10} {"ускорение":>10}')
+    print(f'{"нет":>8} {raw:>10.0f} {"-":>10} {"1.0x":>10}')
+    for size in CACHE_SIZES:
+        cached = lru_cache(maxsize=size)(slugify)
+        elapsed = measure(cached, titles)
+        info = cached.cache_info()
+        hit_rate = info.hits / (info.hits + info.misses)
+        print(f'{size:>8} {elapsed:>10.0f} {hit_rate:>10.1%} '
+              f'{raw / elapsed:>9.1f}x')
+    clear_transliteration_cache()
+    elapsed = measure(transliterate, titles)
+    stats = transliteration_cache_stats()
+    print(f'notes.slugs.transliterate (maxsize={stats["maxsize"]}): '
+          f'{elapsed:.0f} мс, попадания {stats["hit_rate"]:.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Параллельная отправка комментариев: обычные настройки и профиль
+yanews.settings_production.
+
+Каждый профиль замеряется в отдельном процессе на временной файловой
+базе: потоки логинятся разными пользователями и отправляют
+комментарии через представление страницы новости.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_sqlite_writes [--threads 8] [--posts 50]
+"""
+import argparse
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROFILES = ('yanews.settings', 'yanews.settings_production')
+
+
+def run_profile(settings_module, threads, posts):
+    """Замер в текущем процессе, печатает строку результата."""
+    from benchmarks.projects import setup_django
+    setup_django('ya_news', settings_module)
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from news.models import News
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['NAME'] = Path(directory) / 'db.sqlite3'
+    settings.ALLOWED_HOSTS = ['testserver']
+    call_command('migrate', verbosity=0)
+    url = reverse('news:detail', args=(News.objects.create(
+        title='Новость', text='Текст'
+    ).pk,))
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(username=f'Читатель {i}') for i in range(threads)
+    )
+    connection.close()
+    # Ошибки «database is locked» считаются, а не печатаются.
+    logging.disable(logging.CRITICAL)
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def post_comments(user):
+        client = Client()
+        client.force_login(user)
+        barrier.wait()
+        for number in range(posts):
+            try:
+                client.post(url, {'text': f'Комментарий {number}'})
+            except OperationalError:
+                errors.append(number)
+        connection.close()
+
+    workers = [
+        threading.Thread(target=post_comments, args=(user,))
+        for user in users
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done = threads * posts - len(errors)
+    print(f'{settings_module:>28} {done / elapsed:>10.0f} {len(errors):>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=50)
+    parser.add_argument('--profile', choices=PROFILES)
+    args = parser.parse_args()
+    if args.profile:
+        return run_profile(args.profile, args.threads, args.posts)
+    print(f'Потоков: {args.threads}, комментариев на поток: {args.posts}')
+    print(f'{"профиль":>28} {"в секунду":>10} {"ошибок":>8}')
+    for profile in PROFILES:
+        subprocess.run([
+            sys.executable, '-m', 'benchmarks.bench_sqlite_writes',
+            '--profile', profile,
+            '--threads', str(args.threads), '--posts', str(args.posts),
+        ], check=True)
+
+
+if __name__ == '__main__':
+    main()
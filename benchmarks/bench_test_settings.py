@@ -0,0 +1,52 @@
+"""
+Время тестовых наборов с обычными настройками и с settings_test.
+
+Каждый набор запускается отдельным процессом pytest несколько раз,
+печатается медиана полного времени запуска, включая создание
+тестовой базы.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_test_settings [--repeats 3]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.projects import BASE_DIR
+
+SUITES = (
+    ('ya_news', 'yanews.settings'),
+    ('ya_news', 'yanews.settings_test'),
+    ('ya_note', 'yanote.settings'),
+    ('ya_note', 'yanote.settings_test'),
+)
+
+
+def run_suite(project, settings_module):
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable, '-m', 'pytest', '-q', '-o', 'addopts=',
+            '-p', 'no:cacheprovider', f'--ds={settings_module}',
+        ],
+        cwd=BASE_DIR / project, check=True, capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeats', type=int, default=3)
+    repeats = parser.parse_args().repeats
+    print(f'{"настройки":>24} {"время, с":>10}')
+    for project, settings_module in SUITES:
+        elapsed = statistics.median(
+            run_suite(project, settings_module) for _ in range(repeats)
+        )
+        print(f'{settings_module:>24} {elapsed:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
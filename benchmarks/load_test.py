@@ -0,0 +1,289 @@
+"""
+Нагрузочный прогон страниц чтения ya_news и ya_note.
+
+База заполняется командой generate_dataset, затем N конкурентных
+клиентов запрашивают смесь страниц: для ya_news -- главную, новости
+(популярные чаще, по числу комментариев), подгрузку комментариев и
+поиск, часть запросов анонимные; для ya_note -- список, заметки и
+поиск от имени случайных авторов. Приложение вызывается напрямую
+через WSGI (потоки) или ASGI (задачи asyncio), без сервера и сети.
+Под ASGI главная, новость, список и заметка запрашиваются по
+асинхронным адресам (ASYNC_ROUTES), остальные -- по обычным.
+Печатаются запросы в секунду и перцентили задержки по страницам.
+
+Каждый проект и интерфейс замеряются в отдельном процессе на
+временной файловой базе с профилем settings_production.
+
+Запуск из корня репозитория:
+    python -m benchmarks.load_test [--interface wsgi] [--requests 5000]
+    [--concurrency 16] [--users 100] [--news 1000] [--comments 20000]
+    [--notes-per-user 50]
+"""
+import argparse
+import asyncio
+import io
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.bench_async_views import call, session_cookie
+
+PROJECTS = {
+    'ya_news': 'yanews.settings_production',
+    'ya_note': 'yanote.settings_production',
+}
+# Параметры командной строки, которые передаются generate_dataset.
+DATASET_OPTIONS = {
+    'ya_news': ('users', 'news', 'comments', 'seed'),
+    'ya_note': ('users', 'notes_per_user', 'seed'),
+}
+INTERFACES = ('wsgi', 'asgi')
+PERCENTILES = (50, 90, 99)
+# Столько пользователей с открытыми сессиями делают запросы.
+SESSIONS = 20
+ANONYMOUS_SHARE = 0.5
+NEWS_MIX = {'home': 4, 'detail': 4, 'comments': 1, 'search': 1}
+NOTES_MIX = {'list': 4, 'detail': 4, 'search': 2}
+SEARCH_WORDS = ('город', 'парк', 'праздник', 'ремонт', 'транспорт')
+NOTES_SEARCH_WORDS = ('молоко', 'билеты', 'отчёт', 'сметана')
+# Страницы, у которых есть асинхронные представления для ASGI.
+ASYNC_ROUTES = {
+    'news:home': 'news:async_home',
+    'news:detail': 'news:async_detail',
+    'notes:list': 'notes:async_list',
+    'notes:detail': 'notes:async_detail',
+}
+
+
+def sessions(users):
+    return [session_cookie(user) for user in users]
+
+
+def route(name, interface):
+    """Имя адреса страницы для интерфейса: под ASGI -- асинхронный."""
+    if interface == 'asgi':
+        return ASYNC_ROUTES.get(name, name)
+    return name
+
+
+def news_plan(rng, total, interface):
+    """Запросы к ya_news: тройки (страница, адрес, заголовок Cookie)."""
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from news.models import News
+
+    cookies = sessions(get_user_model().objects.all()[:SESSIONS])
+    news = list(News.objects.values_list('pk', 'comment_count'))
+    popular = list(accumulate(count + 1 for _, count in news))
+    pages = {
+        'home': lambda: reverse(route('news:home', interface)),
+        'detail': lambda: reverse(route('news:detail', interface), args=(
+            rng.choices(news, cum_weights=popular)[0][0],
+        )),
+        'comments': lambda: reverse('news:comments', args=(
+            rng.choices(news, cum_weights=popular)[0][0],
+        )),
+        'search': lambda: reverse('news:search') + '?' + urlencode(
+            {'q': rng.choice(SEARCH_WORDS)}
+        ),
+    }
+    plan = []
+    for page in rng.choices(
+        list(NEWS_MIX), weights=NEWS_MIX.values(), k=total
+    ):
+        anonymous = rng.random() < ANONYMOUS_SHARE
+        plan.append((page, pages[page](),
+                     b'' if anonymous else rng.choice(cookies)))
+    return plan
+
+
+def notes_plan(rng, total, interface):
+    """Запросы к ya_note: заметки запрашивает только их автор."""
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    users = list(get_user_model().objects.all()[:SESSIONS])
+    cookies = dict(zip(users, sessions(users)))
+    slugs = {}
+    for author_id, slug in Note.objects.filter(
+        author__in=users
+    ).values_list('author_id', 'slug'):
+        slugs.setdefault(author_id, []).append(slug)
+    pages = {
+        'list': lambda user: reverse(route('notes:list', interface)),
+        'detail': lambda user: reverse(route('notes:detail', interface), args=(
+            rng.choice(slugs[user.pk]),
+        )),
+        'search': lambda user: reverse('notes:search') + '?' + urlencode(
+            {'q': rng.choice(NOTES_SEARCH_WORDS)}
+        ),
+    }
+    plan = []
+    for page in rng.choices(
+        list(NOTES_MIX), weights=NOTES_MIX.values(), k=total
+    ):
+        user = rng.choice(users)
+        plan.append((page, pages[page](user), cookies[user]))
+    return plan
+
+
+def wsgi_environ(path, cookie):
+    path, _, query = path.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': cookie.decode(),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def run_wsgi(application, plan, concurrency):
+    """Задержки запросов плана в секундах и их статусы, в порядке плана."""
+
+    def request(item):
+        _, path, cookie = item
+        statuses = []
+        start = time.perf_counter()
+        response = application(
+            wsgi_environ(path, cookie),
+            lambda status, headers: statuses.append(int(status[:3])),
+        )
+        for _ in response:
+            pass
+        response.close()
+        return time.perf_counter() - start, statuses[0]
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(request, plan))
+
+
+def run_asgi(application, plan, concurrency):
+    async def run():
+        results = [None] * len(plan)
+        numbers = iter(range(len(plan)))
+
+        async def client():
+            for number in numbers:
+                _, path, cookie = plan[number]
+                start = time.perf_counter()
+                status = await call(application, path, cookie)
+                results[number] = time.perf_counter() - start, status
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return results
+
+    return asyncio.run(run())
+
+
+def percentile(latencies, percent):
+    return latencies[max(int(len(latencies) * percent / 100) - 1, 0)]
+
+
+def report(plan, results, elapsed):
+    """Строки таблицы: по каждой странице и по всем запросам вместе."""
+    groups = {}
+    for (page, _, _), result in zip(plan, results):
+        groups.setdefault(page, []).append(result)
+    groups['всего'] = results
+    for page, page_results in groups.items():
+        latencies = sorted(latency for latency, _ in page_results)
+        errors = sum(status != 200 for _, status in page_results)
+        columns = ''.join(
+            f'{percentile(latencies, percent) * 1000:>9.1f}'
+            for percent in PERCENTILES
+        )
+        print(f'{page:>10} {len(latencies):>8} '
+              f'{len(latencies) / elapsed:>10.0f}{columns} {errors:>7}')
+
+
+def run_project(project, interface, arguments):
+    """Замер в текущем процессе, печатает строки результата."""
+    from benchmarks.projects import setup_django
+    setup_django(project, arguments.settings or PROJECTS[project])
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['NAME'] = Path(directory) / 'db.sqlite3'
+    settings.ALLOWED_HOSTS = ['localhost', 'testserver']
+    # Журнал SQL-запросов в режиме отладки рос бы весь замер.
+    settings.DEBUG = False
+    call_command('migrate', verbosity=0)
+    call_command('generate_dataset', stdout=io.StringIO(), **{
+        name: getattr(arguments, name) for name in DATASET_OPTIONS[project]
+    })
+    rng = random.Random(arguments.seed)
+    make_plan = news_plan if project == 'ya_news' else notes_plan
+    plan = make_plan(rng, arguments.requests, interface)
+    if interface == 'wsgi':
+        from django.core.wsgi import get_wsgi_application
+        application, run = get_wsgi_application(), run_wsgi
+    else:
+        from django.core.asgi import get_asgi_application
+        application, run = get_asgi_application(), run_asgi
+    # Прогрев: шаблоны, соединения с базой, кэш страниц.
+    run(application, plan[:arguments.concurrency * 4], arguments.concurrency)
+    start = time.perf_counter()
+    results = run(application, plan, arguments.concurrency)
+    elapsed = time.perf_counter() - start
+    print(f'{project} {interface}:')
+    report(plan, results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--project', choices=PROJECTS)
+    parser.add_argument('--interface', choices=INTERFACES)
+    parser.add_argument('--settings', help='Модуль настроек вместо '
+                        'профиля settings_production.')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--notes-per-user', type=int, default=50)
+    arguments = parser.parse_args()
+    if arguments.project and arguments.interface:
+        return run_project(arguments.project, arguments.interface, arguments)
+    print(f'Запросов: {arguments.requests}, '
+          f'клиентов: {arguments.concurrency}')
+    print(f'{"страница":>10} {"запросов":>8} {"в секунду":>10}'
+          + ''.join(f'{f"p{percent}, мс":>9}' for percent in PERCENTILES)
+          + f' {"ошибок":>7}')
+    for project in [arguments.project] if arguments.project else PROJECTS:
+        for interface in (
+            [arguments.interface] if arguments.interface else INTERFACES
+        ):
+            subprocess.run([
+                sys.executable, '-m', 'benchmarks.load_test',
+                *sys.argv[1:],
+                '--project', project, '--interface', interface,
+            ], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def use_project(name):
+    """Делает пакеты проекта (ya_news или ya_note) импортируемыми."""
+    project_dir = str(BASE_DIR / name)
+    if project_dir not in sys.path:
+        sys.path.insert(0, project_dir)
+
+
+def use_settings(module):
+    """Указывает Django модуль настроек проекта."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', module)
+
+
+def setup_django(name, settings_module):
+    """Подключает проект и настраивает Django для замеров."""
+    use_project(name)
+    use_settings(settings_module)
+    import django
+    django.setup()
@@ -0,0 +1,327 @@
+"""
+Микробенчмарки горячих путей с сохранённым эталоном.
+
+Замеряются страницы NewsList и NewsDetail, CommentForm.clean_text,
+NoteForm.clean_slug и Note.save при нескольких размерах данных.
+Каждый замер выполняется в транзакции, которая затем откатывается,
+поэтому размеры не влияют друг на друга. Время вызова -- лучшее из
+нескольких повторов (timeit) в нескольких запусках; каждый запуск
+проекта -- отдельный процесс на временной файловой базе.
+
+Время хранится в единицах эталонной работы интерпретатора, которая
+замеряется в том же процессе, поэтому эталон benchmarks/baseline.json
+мало зависит от скорости машины. Запуск завершается с кодом 1, если
+какой-то путь стал медленнее эталона больше чем на --threshold
+(по умолчанию 50%). После ожидаемого ускорения или смены версий
+Python и SQLite эталон перезаписывают с --save.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite [--threshold 0.5] [--rounds 3] [--save]
+    [--case news_detail]
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+THRESHOLD = 0.5
+REPEATS = 7
+ROUNDS = 3
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+BATCH_SIZE = 2000
+NOTE_TITLE = 'Список покупок'
+
+
+def logged_in_client(user):
+    """Клиент вошедшего пользователя: кэш страниц для анонимных не нужен."""
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def get_page(client, url):
+    def request():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} вернул {response.status_code}')
+    return request
+
+
+def news_list(size):
+    """Главная при size новостей в базе."""
+    from django.urls import reverse
+
+    from news.synthetic import create_news, create_users
+
+    user, = create_users(1, BATCH_SIZE)
+    create_news(random.Random(size), size, BATCH_SIZE)
+    return get_page(logged_in_client(user), reverse('news:home'))
+
+
+def news_detail(size):
+    """Страница новости с size комментариями."""
+    from django.urls import reverse
+
+    from news.synthetic import create_comments, create_news, create_users
+
+    rng = random.Random(size)
+    users = create_users(10, BATCH_SIZE)
+    news, = create_news(rng, 1, BATCH_SIZE)
+    create_comments(rng, [news], users, size, BATCH_SIZE)
+    return get_page(
+        logged_in_client(users[0]), reverse('news:detail', args=(news.pk,))
+    )
+
+
+def comment_clean_text(size):
+    """Проверка текста комментария при size запрещённых словах."""
+    from news.forms import CommentForm, banned_words
+    from news.models import BannedWord
+    from news.synthetic import sentence
+
+    BannedWord.objects.bulk_create(
+        BannedWord(word=f'слово{number}') for number in range(size)
+    )
+    banned_words.expire()
+    form = CommentForm()
+    form.cleaned_data = {'text': sentence(random.Random(size), 200)}
+    return form.clean_text
+
+
+def note_clean_slug(size):
+    """Проверка уникальности slug при size заметках в базе."""
+    from notes.forms import NoteForm
+    from notes.synthetic import create_notes, create_users
+
+    create_notes(
+        random.Random(size), create_users(10, BATCH_SIZE), size // 10,
+        BATCH_SIZE,
+    )
+    form = NoteForm()
+    form.cleaned_data = {'slug': 'free-slug'}
+    return form.clean_slug
+
+
+def note_save(size):
+    """Новая заметка, когда заголовок уже есть у size заметок."""
+    from django.db import transaction
+
+    from notes.models import Note
+    from notes.slugs import transliterate
+    from notes.synthetic import create_users
+
+    author, = create_users(1, BATCH_SIZE)
+    base = transliterate(NOTE_TITLE)
+    Note.objects.bulk_create(
+        (
+            Note(title=NOTE_TITLE, text='Текст', author=author,
+                 slug=f'{base}-{number}' if number > 1 else base)
+            for number in range(1, size + 1)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    def save():
+        # Откат к точке сохранения: иначе каждая сохранённая заметка
+        # добавляла бы номер, и размер рос бы по ходу замера.
+        with transaction.atomic():
+            Note(title=NOTE_TITLE, text='Текст', author=author).save()
+            transaction.set_rollback(True)
+    return save
+
+
+# Проект -> (имя пути, функция подготовки, размеры данных). Функция
+# заполняет базу для размера и возвращает замеряемый вызов.
+CASES = {
+    'ya_news': (
+        ('news_list', news_list, (10, 1000, 10000)),
+        ('news_detail', news_detail, (10, 100, 1000)),
+        ('comment_clean_text', comment_clean_text, (0, 100, 10000)),
+    ),
+    'ya_note': (
+        ('note_clean_slug', note_clean_slug, (100, 1000, 10000)),
+        ('note_save', note_save, (1, 100, 1000)),
+    ),
+}
+
+
+def calibration():
+    """
+    Эталонная работа интерпретатора: время путей делится на её время.
+
+    Так сравнение не зависит от общей скорости машины, которая на
+    общих серверах меняется от запуска к запуску.
+    """
+    rows = [{'id': number, 'title': f'Новость {number}'}
+            for number in range(200)]
+    sorted(rows, key=lambda row: row['title'], reverse=True)
+
+
+def measure(func):
+    """
+    Лучшее время одного вызова в секундах, после прогрева.
+
+    Считается процессорное время: SQLite работает в том же процессе,
+    а соседние процессы на машине меньше влияют на результат.
+    """
+    timer = timeit.Timer(func, timer=time.process_time)
+    timer.autorange()
+    number, _ = timer.autorange()
+    return min(timer.repeat(REPEATS, number)) / number
+
+
+def run_project(project, pattern):
+    """
+    Замеры проекта в текущем процессе: время эталонной работы и
+    {'имя[размер]': время вызова в единицах эталонной работы}.
+    """
+    from benchmarks.projects import setup_django
+    setup_django(project, PROJECTS[project])
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import transaction
+
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['NAME'] = Path(directory) / 'db.sqlite3'
+    settings.ALLOWED_HOSTS = ['testserver']
+    # Журнал SQL-запросов в режиме отладки рос бы весь замер.
+    settings.DEBUG = False
+    call_command('migrate', verbosity=0)
+    unit = measure(calibration)
+    results = {}
+    for name, prepare, sizes in CASES[project]:
+        if pattern and pattern not in name:
+            continue
+        for size in sizes:
+            cache.clear()
+            with transaction.atomic():
+                results[f'{name}[{size}]'] = measure(prepare(size))
+                transaction.set_rollback(True)
+    unit = min(unit, measure(calibration))
+    return unit, {name: seconds / unit for name, seconds in results.items()}
+
+
+def collect(projects, pattern, rounds):
+    """
+    Время эталонной работы и лучшие результаты из rounds запусков
+    каждого проекта.
+
+    Каждый запуск -- отдельный процесс: так сглаживаются и случайные
+    задержки, и неудачное размещение данных в памяти одного процесса.
+    """
+    unit = float('inf')
+    results = {}
+    for _ in range(rounds):
+        for project in projects:
+            command = [sys.executable, '-m', 'benchmarks.suite', '--json',
+                       '--project', project]
+            if pattern:
+                command += ['--case', pattern]
+            output = subprocess.run(
+                command, check=True, capture_output=True, text=True
+            ).stdout
+            run_unit, costs = json.loads(output.splitlines()[-1])
+            unit = min(unit, run_unit)
+            for name, cost in costs.items():
+                name = f'{project}.{name}'
+                results[name] = min(cost, results.get(name, cost))
+    return unit, results
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))['results']
+
+
+def save_baseline(path, unit, results):
+    """Записывает эталон, сохраняя замеры путей, которые не запускались."""
+    baseline = {**load_baseline(path), **results}
+    path.write_text(json.dumps({
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'system': platform.system(),
+            # Для справки: результаты хранятся в единицах этой работы.
+            'calibration_seconds': unit,
+        },
+        'results': baseline,
+    }, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+
+def compare(unit, results, baseline, threshold):
+    """
+    Печатает таблицу сравнения, возвращает замедлившиеся пути.
+
+    Эталон пересчитывается в микросекунды по скорости текущей машины.
+    """
+    print(f'{"путь":>34} {"эталон, мкс":>12} {"сейчас, мкс":>12} '
+          f'{"изменение":>10}')
+    regressions = []
+    for name, cost in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            change = 'новый'
+        else:
+            ratio = cost / expected
+            change = f'{ratio - 1:+.0%}'
+            if ratio > 1 + threshold:
+                regressions.append(name)
+                change += ' !'
+        expected = (
+            '-' if expected is None else f'{expected * unit * 1e6:.1f}'
+        )
+        print(f'{name:>34} {expected:>12} {cost * unit * 1e6:>12.1f} '
+              f'{change:>10}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--project', choices=PROJECTS)
+    parser.add_argument('--case', help='Только пути, в имени которых '
+                        'есть эта строка.')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='Допустимое замедление, доля от эталона.')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--rounds', type=int, default=ROUNDS,
+                        help='Сколько раз запускать замеры каждого проекта.')
+    parser.add_argument('--save', action='store_true',
+                        help='Записать результаты в эталон.')
+    parser.add_argument('--json', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.json:
+        print(json.dumps(run_project(args.project, args.case)))
+        return 0
+    projects = [args.project] if args.project else list(PROJECTS)
+    unit, results = collect(projects, args.case, args.rounds)
+    regressions = compare(unit, results, load_baseline(args.baseline),
+                          args.threshold)
+    if args.save:
+        save_baseline(args.baseline, unit, results)
+        print(f'Эталон записан в {args.baseline}')
+        return 0
+    if regressions:
+        print(f'Медленнее эталона больше чем на {args.threshold:.0%}: '
+              + ', '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Параллельный запуск тестов ya_news и ya_note.
+
+Тесты обоих проектов собираются заранее и делятся на части по числу
+рабочих процессов. Каждая часть -- отдельный процесс pytest со своей
+тестовой базой SQLite в памяти, поэтому части не мешают друг другу.
+Классы TestCase не разрезаются: setUpTestData выполняется в одном
+процессе один раз. Отчёты частей (JUnit XML) объединяются в общий.
+
+Код выхода -- как у последовательного запуска: 0, если все тесты
+прошли, иначе код pytest первого упавшего проекта (ya_news, ya_note).
+
+Настройки проектов задают переменные окружения YANEWS_SETTINGS
+и YANOTE_SETTINGS (по умолчанию профили settings_test); для ya_news,
+как и в run_tests.sh, учитывается также DJANGO_SETTINGS_MODULE.
+
+Запуск из корня репозитория:
+    python parallel_tests.py [--workers N] [--junitxml report.xml]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from xml.etree import ElementTree
+
+BASE_DIR = Path(__file__).resolve().parent
+PROJECTS = {
+    'ya_news': os.environ.get('YANEWS_SETTINGS') or os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'yanews.settings_test'
+    ),
+    'ya_note': os.environ.get('YANOTE_SETTINGS', 'yanote.settings_test'),
+}
+# addopts из pytest.ini включает подробный вывод, для сбора тестов
+# он заменяется кратким списком идентификаторов.
+COLLECT_OPTIONS = ('-o', 'addopts=', '-p', 'no:cacheprovider', '-q')
+
+
+def pytest_command(*args):
+    return [sys.executable, '-m', 'pytest', *args]
+
+
+def run(project, args):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': PROJECTS[project]}
+    return subprocess.run(
+        pytest_command(*args), cwd=BASE_DIR / project, env=env,
+        capture_output=True, text=True,
+    )
+
+
+def collect(project):
+    """Идентификаторы тестов проекта, сгруппированные по классам."""
+    result = run(project, (*COLLECT_OPTIONS, '--collect-only'))
+    if result.returncode:
+        return result, None
+    groups = {}
+    for line in result.stdout.splitlines():
+        if '::' not in line:
+            continue
+        path, *names = line.split('::')
+        # У теста-метода класса группа -- класс, у функции -- сам тест.
+        key = '::'.join([path, *names[:-1]]) if len(names) > 1 else line
+        groups.setdefault(key, []).append(line)
+    return result, list(groups.values())
+
+
+def split(groups, parts):
+    """Делит группы тестов на parts частей примерно поровну."""
+    shards = [[] for _ in range(min(parts, len(groups)))]
+    for group in sorted(groups, key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return shards
+
+
+def run_shard(project, tests, report):
+    result = run(project, ('--tb=line', f'--junitxml={report}', *tests))
+    return project, result, report
+
+
+def merge_reports(results, path=None):
+    """
+    Сводка по отчётам частей: число тестов по проектам и упавшие.
+
+    Если указан path, объединённый отчёт JUnit XML пишется в него.
+    """
+    merged = ElementTree.Element('testsuites')
+    totals = {project: dict.fromkeys(
+        ('tests', 'failures', 'errors', 'skipped'), 0
+    ) for project in PROJECTS}
+    failed = []
+    for project, _, report in results:
+        if not Path(report).exists():
+            continue
+        for suite in ElementTree.parse(report).getroot().iter('testsuite'):
+            suite.set('name', project)
+            merged.append(suite)
+            for key, total in totals[project].items():
+                totals[project][key] = total + int(suite.get(key, 0))
+            for case in suite.iter('testcase'):
+                problem = case.find('failure')
+                if problem is None:
+                    problem = case.find('error')
+                if problem is not None:
+                    failed.append(
+                        f'{project}: {case.get("classname")}::'
+                        f'{case.get("name")} - {problem.get("message")}'
+                    )
+    if path:
+        ElementTree.ElementTree(merged).write(
+            path, encoding='utf-8', xml_declaration=True
+        )
+    return totals, failed
+
+
+def exit_code(results):
+    """Код первого упавшего проекта в порядке PROJECTS."""
+    codes = {}
+    for project, result, _ in results:
+        if result.returncode and project not in codes:
+            codes[project] = result.returncode
+    return next(
+        (codes[project] for project in PROJECTS if project in codes), 0
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--junitxml', help='Общий отчёт JUnit XML.')
+    args = parser.parse_args()
+    with ThreadPoolExecutor(len(PROJECTS)) as pool:
+        collected = dict(zip(PROJECTS, pool.map(collect, PROJECTS)))
+    for project, (result, groups) in collected.items():
+        if groups is None:
+            print(result.stdout, result.stderr, sep='\n')
+            return result.returncode
+    total = sum(
+        len(group) for _, groups in collected.values() for group in groups
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = []
+        for project, (_, groups) in collected.items():
+            size = sum(len(group) for group in groups)
+            parts = max(1, round(args.workers * size / total))
+            for number, tests in enumerate(split(groups, parts)):
+                report = Path(directory) / f'{project}-{number}.xml'
+                jobs.append((project, tests, report))
+        with ThreadPoolExecutor(args.workers) as pool:
+            results = list(pool.map(lambda job: run_shard(*job), jobs))
+        totals, failed = merge_reports(results, args.junitxml)
+    for project, result, _ in results:
+        if result.returncode:
+            print(result.stdout, result.stderr, sep='\n')
+    for project, counts in totals.items():
+        summary = ', '.join(f'{key}: {value}' for key, value in counts.items())
+        print(f'{project} ({summary})')
+    for line in failed:
+        print(f'FAILED {line}')
+    return exit_code(results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
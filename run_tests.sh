@@ -21,13 +21,24 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
+        if [[ -n "$TEST_WORKERS" ]]; then
+            # Оба проекта сразу, тесты распределены по TEST_WORKERS процессам.
+            if python parallel_tests.py --workers "$TEST_WORKERS" 1>&2;
+            then
+                exit 0
+            else
+                status=$?
+                print_message " При запуске упали ваши тесты. Проверьте проекты, указанные в отчёте выше " "=" 1
+                echo \`\`\` 1>&2
+                exit $status
+            fi
+        fi
         cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
+        export DJANGO_SETTINGS_MODULE="${YANEWS_SETTINGS:-${DJANGO_SETTINGS_MODULE:-yanews.settings_test}}"
         if pytest --tb=line 1>&2;
         then
             cd ../ya_note
-            unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
+            export DJANGO_SETTINGS_MODULE="${YANOTE_SETTINGS:-yanote.settings_test}"
             if pytest --tb=line 1>&2;
             then
                 exit 0
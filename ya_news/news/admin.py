@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, News
+from .models import BannedWord, Comment, News
 
 
 class CommentInline(admin.StackedInline):
@@ -13,3 +13,20 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    readonly_fields = ('comment_count',)
+
+    def save_related(self, request, form, formsets, change):
+        """
+        Пересчитываем счётчик комментариев после сохранения инлайнов.
+
+        Инлайны сохраняют комментарии по одному, и каждый сдвигает
+        счётчик; пересчёт заодно исправляет счётчик, если он разошёлся.
+        """
+        super().save_related(request, form, formsets, change)
+        News.objects.filter(pk=form.instance.pk).sync_comment_count()
+
+
+@admin.register(BannedWord)
+class BannedWordAdmin(admin.ModelAdmin):
+    list_display = ('word', 'changed')
+    search_fields = ('word',)
@@ -1,7 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from .search import search_supported_check
+        checks.register(search_supported_check, checks.Tags.database)
@@ -0,0 +1,143 @@
+import re
+import threading
+import time
+from functools import lru_cache
+
+END = ''
+# На коротких списках встроенный поиск подстроки быстрее выражения.
+SUBSTRING_SCAN_LIMIT = 64
+
+escape = lru_cache(maxsize=None)(re.escape)
+
+
+def _trie_pattern(node):
+    """
+    Превращает префиксное дерево слов в регулярное выражение.
+
+    Общие префиксы попадают в выражение один раз, поэтому движок
+    регулярных выражений проверяет каждую позицию текста за время,
+    зависящее от длины слов, а не от их количества.
+    """
+    branches = [
+        escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != END
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1:
+        pattern = branches[0]
+    else:
+        pattern = '(?:' + '|'.join(branches) + ')'
+    if END in node:
+        pattern = f'(?:{pattern})?'
+    return pattern
+
+
+class BannedWordsMatcher:
+    """
+    Ищет запрещённые слова в тексте за один проход.
+
+    Выражение собирается один раз при создании объекта.
+    whole_words -- искать только целые слова, а не подстроки;
+    fold_yo -- не различать «ё» и «е».
+    Регистр не учитывается в любом случае.
+    Короткие списки без whole_words проверяются поиском подстрок.
+    """
+
+    def __init__(self, words, whole_words=False, fold_yo=True):
+        self.whole_words = whole_words
+        self.fold_yo = fold_yo
+        self.words = tuple(sorted({
+            self.normalize(word.strip()) for word in words
+        } - {''}))
+        self.regex = None
+        if whole_words or len(self.words) > SUBSTRING_SCAN_LIMIT:
+            self.regex = self._compile()
+
+    def _compile(self):
+        trie = {}
+        for word in self.words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[END] = {}
+        pattern = _trie_pattern(trie)
+        if self.whole_words:
+            pattern = rf'(?<!\w){pattern}(?!\w)'
+        return re.compile(pattern)
+
+    def normalize(self, text):
+        text = text.casefold()
+        if self.fold_yo:
+            text = text.replace('ё', 'е')
+        return text
+
+    def search(self, text):
+        """Возвращает первое найденное запрещённое слово или None."""
+        text = self.normalize(text)
+        if self.regex is None:
+            return next((word for word in self.words if word in text), None)
+        match = self.regex.search(text)
+        return match.group() if match else None
+
+    def __len__(self):
+        return len(self.words)
+
+
+class BannedWordsRegistry:
+    """
+    Собранный BannedWordsMatcher, который сам следит за словарём.
+
+    Не чаще раза в interval секунд (число или функция, которая его
+    возвращает при каждой проверке) registry запрашивает у get_version()
+    дешёвую отметку версии словаря и, только если она изменилась,
+    перечитывает слова через get_words() и собирает новый matcher.
+    Пока один поток пересобирает matcher, остальные продолжают
+    проверять тексты прежним.
+    """
+
+    def __init__(self, get_version, get_words, interval, **matcher_options):
+        self.get_version = get_version
+        self.get_words = get_words
+        self.get_interval = (
+            interval if callable(interval) else lambda: interval
+        )
+        self.matcher_options = matcher_options
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._version = None
+        self._checked_at = float('-inf')
+
+    def get_matcher(self):
+        matcher = self._matcher
+        if (
+            matcher is not None
+            and time.monotonic() - self._checked_at < self.get_interval()
+        ):
+            return matcher
+        if not self._lock.acquire(blocking=matcher is None):
+            return matcher
+        try:
+            return self._refresh()
+        finally:
+            self._lock.release()
+
+    def _refresh(self):
+        if time.monotonic() - self._checked_at < self.get_interval():
+            return self._matcher
+        version = self.get_version()
+        if self._matcher is None or version != self._version:
+            self._matcher = BannedWordsMatcher(
+                self.get_words(), **self.matcher_options
+            )
+            self._version = version
+        self._checked_at = time.monotonic()
+        return self._matcher
+
+    def expire(self):
+        """Проверить версию словаря при следующем обращении."""
+        self._checked_at = float('-inf')
+
+    def search(self, text):
+        return self.get_matcher().search(text)
@@ -0,0 +1,158 @@
+import hashlib
+from abc import ABCMeta, abstractmethod
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .models import News
+
+
+def _home_versions():
+    return News.objects.values_list(
+        'pk', 'version'
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+def _hash_home_state(news_versions):
+    state = ','.join(f'{pk}:{version}' for pk, version in news_versions)
+    return hashlib.md5(state.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_home_state(request):
+    """
+    Отпечаток главной страницы: хэш пар (id, версия) её новостей.
+
+    Порядок новостей задаётся датой, а версия меняется с каждым
+    комментарием, поэтому отпечаток меняется, когда выходит новая
+    новость или обновляются комментарии к показанным.
+    Считается одним запросом и запоминается в объекте запроса.
+    """
+    if not hasattr(request, '_news_home_state'):
+        request._news_home_state = _hash_home_state(_home_versions())
+    return request._news_home_state
+
+
+async def aget_home_state(request):
+    """Асинхронный вариант get_home_state()."""
+    if not hasattr(request, '_news_home_state'):
+        request._news_home_state = _hash_home_state(
+            [versions async for versions in _home_versions()]
+        )
+    return request._news_home_state
+
+
+def _detail_state(pk):
+    return News.objects.filter(pk=pk).values_list('version', flat=True)
+
+
+def get_detail_state(request, pk):
+    """
+    Версия новости: меняется при любой правке новости и её комментариев.
+
+    Возвращает None, если новости нет. Считается одним запросом
+    и запоминается в объекте запроса.
+    """
+    if not hasattr(request, '_news_detail_state'):
+        request._news_detail_state = _detail_state(pk).first()
+    return request._news_detail_state
+
+
+async def aget_detail_state(request, pk):
+    """Асинхронный вариант get_detail_state()."""
+    if not hasattr(request, '_news_detail_state'):
+        request._news_detail_state = await _detail_state(pk).afirst()
+    return request._news_detail_state
+
+
+def home_cache_key(request):
+    """Ключ кэша главной страницы."""
+    return f'news:home:{get_home_state(request)}'
+
+
+def detail_cache_key(request, pk):
+    """Ключ кэша страницы новости, None для несуществующей новости."""
+    state = get_detail_state(request, pk)
+    if state is None:
+        return None
+    return f'news:detail:{pk}:{state}'
+
+
+def home_etag(request, *args, **kwargs):
+    """Значение ETag главной страницы, своё для каждого пользователя."""
+    return f'{get_home_state(request)}-{request.user.pk or 0}'
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    """
+    Значение ETag страницы новости, своё для каждого пользователя.
+
+    Last-Modified у страницы нет: время последнего комментария не
+    меняется при правке новости, правке и удалении комментариев и
+    решениях модерации, а версия новости меняется при всех них.
+    """
+    state = get_detail_state(request, pk)
+    if state is None:
+        return None
+    return f'{pk}-{state}-{request.user.pk or 0}'
+
+
+class AnonymousPageCacheMixin(metaclass=ABCMeta):
+    """
+    Кэширует страницу целиком для анонимных пользователей.
+
+    Потомки определяют get_page_cache_key().
+    """
+
+    @abstractmethod
+    def get_page_cache_key(self):
+        """
+        Ключ кэша страницы или None, если страницу не кэшировать.
+
+        Ключ должен включать версию данных, поэтому старые записи
+        просто перестают запрашиваться, а не удаляются явно.
+        """
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = self.get_page_cache_key()
+        if key is None:
+            return super().get(request, *args, **kwargs)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda rendered: cache.set(
+                key, rendered.content, settings.NEWS_CACHE_TIMEOUT
+            )
+        )
+        return response
+
+
+async def acached_page(request, cache_key, etag, render_page):
+    """
+    Ответ страницы для асинхронных представлений.
+
+    Повторяет декоратор condition и AnonymousPageCacheMixin:
+    ответ 304 по ETag, готовая страница из кэша для анонимных
+    пользователей, иначе -- await render_page().
+    """
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        anonymous = not request.user.is_authenticated
+        content = await cache.aget(cache_key) if anonymous else None
+        if content is not None:
+            response = HttpResponse(content)
+        else:
+            response = await render_page()
+            if anonymous:
+                await cache.aset(
+                    cache_key, response.content, settings.NEWS_CACHE_TIMEOUT
+                )
+    response.headers.setdefault('ETag', etag)
+    return response
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
 
-from .models import Comment
+from .banned_words import BannedWordsRegistry
+from .models import BannedWord, Comment
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +14,28 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+def get_banned_words_version():
+    """Отметка версии словаря: число слов и время последней правки."""
+    stamp = BannedWord.objects.aggregate(
+        total=Count('pk'), changed=Max('changed')
+    )
+    return stamp['total'], stamp['changed']
+
+
+def get_banned_words():
+    return BAD_WORDS + tuple(
+        BannedWord.objects.values_list('word', flat=True)
+    )
+
+
+banned_words = BannedWordsRegistry(
+    get_banned_words_version,
+    get_banned_words,
+    # Настройка читается при каждой проверке, а не при импорте модуля.
+    interval=lambda: settings.BANNED_WORDS_CHECK_INTERVAL,
+)
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +45,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if banned_words.search(text):
+            raise ValidationError(WARNING)
         return text
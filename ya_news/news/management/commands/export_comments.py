@@ -0,0 +1,15 @@
+from news.models import Comment
+from news.transfer import ExportCommand
+
+
+class Command(ExportCommand):
+    help = (
+        'Выгружает комментарии в JSONL или CSV в формате '
+        'import_comments.'
+    )
+    fields = ('id', 'news', 'author', 'text', 'created', 'status')
+
+    def get_rows(self):
+        return Comment.objects.order_by('pk').values_list(
+            'id', 'news_id', 'author__username', 'text', 'created', 'status'
+        )
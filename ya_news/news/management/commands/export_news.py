@@ -0,0 +1,10 @@
+from news.models import News
+from news.transfer import ExportCommand
+
+
+class Command(ExportCommand):
+    help = 'Выгружает новости в JSONL или CSV в формате import_news.'
+    fields = ('id', 'title', 'text', 'date')
+
+    def get_rows(self):
+        return News.objects.order_by('pk').values_list(*self.fields)
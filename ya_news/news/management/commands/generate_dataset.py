@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from news.synthetic import PASSWORD, generate
+from news.transfer import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для нагрузочных замеров: '
+        'пользователи user1..userN, новости за последние дни и '
+        'комментарии, распределённые по новостям неравномерно '
+        '(по закону Ципфа). Одно и то же --seed даёт те же данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк сохранять за один запрос.',
+        )
+
+    def handle(self, *args, users, news, comments, seed, batch_size,
+               **options):
+        try:
+            with transaction.atomic():
+                totals = generate(users, news, comments, seed, batch_size)
+        except IntegrityError as e:
+            raise CommandError(
+                f'Не удалось создать данные, база должна быть пустой: {e}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Создано пользователей: {}, новостей: {}, '
+            'комментариев: {}'.format(*totals)
+        ))
+        self.stdout.write(f'Пароль пользователей: {PASSWORD}')
@@ -0,0 +1,15 @@
+from news.models import News
+from news.transfer import ImportCommand
+
+
+class Command(ImportCommand):
+    help = (
+        'Загружает новости из файла JSONL или CSV пачками. '
+        'Поля записи: title, text, необязательные id и date.'
+    )
+    model = News
+    fields = ('id', 'title', 'text', 'date')
+
+    def import_batch(self, records, first_line):
+        # Поисковый индекс пополняют триггеры базы.
+        News.objects.bulk_create(self.build(records, first_line))
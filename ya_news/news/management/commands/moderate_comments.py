@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import BATCH_SIZE, moderate_batch
+
+IDLE_INTERVAL = 2
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет комментарии, ожидающие модерации, пачками. '
+        'С --loop работает постоянно как фоновый обработчик очереди.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько комментариев проверять за один проход.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые комментарии.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=IDLE_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        while True:
+            decisions = moderate_batch(batch_size)
+            if decisions:
+                self.report(decisions)
+                continue
+            if not loop:
+                break
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS('Очередь модерации пуста'))
+
+    def report(self, decisions):
+        summary = ', '.join(
+            f'{status.label}: {count}' for status, count in decisions.items()
+        )
+        self.stdout.write(f'Проверена пачка комментариев ({summary})')
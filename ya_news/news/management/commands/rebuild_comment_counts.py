@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from news.models import News
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Находит расхождения счётчиков комментариев у новостей '
+        'с фактическим числом комментариев и пересчитывает их пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не изменяя.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько новостей пересчитывать за один запрос.',
+        )
+
+    def handle(self, *args, check, batch_size, **options):
+        drifted = News.objects.with_actual_comment_count().exclude(
+            comment_count=F('actual_comment_count')
+        ).order_by('pk').values_list(
+            'pk', 'comment_count', 'actual_comment_count'
+        )
+        if check:
+            return self.check_drift(drifted)
+        drifted_ids = list(drifted.values_list('pk', flat=True))
+        for start in range(0, len(drifted_ids), batch_size):
+            batch = drifted_ids[start:start + batch_size]
+            with transaction.atomic():
+                News.objects.filter(pk__in=batch).sync_comment_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано счётчиков комментариев: {len(drifted_ids)}'
+        ))
+
+    def check_drift(self, drifted):
+        total = 0
+        for pk, stored, actual in drifted.iterator():
+            total += 1
+            self.stdout.write(
+                f'Новость {pk}: в счётчике {stored}, комментариев {actual}'
+            )
+        if total:
+            raise CommandError(
+                f'Расхождения в счётчиках комментариев: {total}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Счётчики комментариев совпадают с фактическими'
+        ))
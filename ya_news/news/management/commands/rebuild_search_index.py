@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from news.search import rebuild_search_index, search_supported
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс новостей и одобренных '
+        'комментариев. Дальше индекс обновляют триггеры базы.'
+    )
+
+    def handle(self, *args, **options):
+        if not search_supported(connection):
+            raise CommandError('Поиску нужна база SQLite с модулем FTS5')
+        with transaction.atomic():
+            rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from news.replication import copy_database
+from news.routers import PRIMARY
+
+SYNC_INTERVAL = 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite во все реплики из '
+        'NEWS_READ_REPLICAS. С --loop работает как репликация.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Копировать постоянно, а не один раз.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=SYNC_INTERVAL,
+            help='Пауза между копированиями в секундах.',
+        )
+
+    def handle(self, *args, loop, interval, **options):
+        if not settings.NEWS_READ_REPLICAS:
+            raise CommandError('В NEWS_READ_REPLICAS не указаны реплики')
+        source = settings.DATABASES[PRIMARY]['NAME']
+        while True:
+            for alias in settings.NEWS_READ_REPLICAS:
+                copy_database(source, settings.DATABASES[alias]['NAME'])
+            if not loop:
+                break
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
@@ -0,0 +1,74 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import RoutingState, routing_state
+
+PINNED_UNTIL_SESSION_KEY = '_news_primary_pinned_until'
+
+
+class ReadReplicaMiddleware:
+    """
+    Включает чтение с реплик для запроса: реплика выбирается
+    один раз на весь запрос.
+
+    Если запрос записал новости или комментарии, сессия на
+    NEWS_REPLICATION_LAG секунд закрепляется за основной базой:
+    реплика могла ещё не получить запись, а пользователь должен
+    сразу увидеть, например, свой комментарий.
+    Должен стоять после SessionMiddleware. Работает и в синхронной,
+    и в асинхронной цепочке, чтобы асинхронные представления под
+    ASGI не переключались в поток ради этого middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.NEWS_READ_REPLICAS:
+            return self.get_response(request)
+        state = self.start(request.session.get(PINNED_UNTIL_SESSION_KEY, 0))
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.NEWS_READ_REPLICAS:
+            return await self.get_response(request)
+        state = self.start(
+            await request.session.aget(PINNED_UNTIL_SESSION_KEY, 0)
+        )
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    @staticmethod
+    def start(pinned_until):
+        return RoutingState(
+            pinned=time.time() < pinned_until,
+            replica=random.choice(settings.NEWS_READ_REPLICAS),
+        )
+
+    @staticmethod
+    def finish(request, state):
+        if state.wrote:
+            request.session[PINNED_UNTIL_SESSION_KEY] = (
+                time.time() + settings.NEWS_REPLICATION_LAG
+            )
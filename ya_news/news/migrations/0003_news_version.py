@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Увеличивается при каждом изменении новости или её комментариев', verbose_name='Версия'),
+        ),
+    ]
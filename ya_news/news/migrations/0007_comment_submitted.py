@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 19:52
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_submitted(apps, schema_editor):
+    """Существующие комментарии отправлены в момент создания."""
+    Comment = apps.get_model('news', 'Comment')
+    Comment.objects.update(submitted=models.F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='news_comment_author_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='submitted',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Время отправки текущей версии текста: обновляется при каждом возврате комментария на модерацию', verbose_name='Отправлен на модерацию'),
+        ),
+        migrations.RunPython(fill_submitted, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'submitted'], name='news_comment_author_idx'),
+        ),
+    ]
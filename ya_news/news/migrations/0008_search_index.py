@@ -0,0 +1,88 @@
+from django.db import migrations
+
+from news.search import search_supported
+
+# Копия схемы из news.search на момент миграции. Миграция, которая
+# пересоздаёт таблицу news_news или news_comment (SQLite делает так при
+# многих изменениях полей), удаляет вместе с ней триггеры: такая
+# миграция должна снова выполнить CREATE TRIGGER отсюда.
+FOLD_TITLE = "replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е')"
+FOLD_TEXT = "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е')"
+INDEX_NEWS = (
+    'INSERT INTO news_news_fts (rowid, title, text) '
+    f'VALUES (new.id, {FOLD_TITLE}, {FOLD_TEXT});'
+)
+INDEX_COMMENT = (
+    'INSERT INTO news_comment_fts (rowid, text, news_id) '
+    f"SELECT new.id, {FOLD_TEXT}, new.news_id "
+    "WHERE new.status = 'approved';"
+)
+UNINDEX_NEWS = 'DELETE FROM news_news_fts WHERE rowid = old.id;'
+UNINDEX_COMMENT = 'DELETE FROM news_comment_fts WHERE rowid = old.id;'
+
+CREATE = [
+    'CREATE VIRTUAL TABLE news_news_fts USING fts5(title, text)',
+    'CREATE VIRTUAL TABLE news_comment_fts '
+    'USING fts5(text, news_id UNINDEXED)',
+    'CREATE TRIGGER news_news_fts_insert '
+    f'AFTER INSERT ON news_news BEGIN {INDEX_NEWS} END',
+    'CREATE TRIGGER news_news_fts_update '
+    'AFTER UPDATE OF title, text ON news_news '
+    f'BEGIN {UNINDEX_NEWS} {INDEX_NEWS} END',
+    'CREATE TRIGGER news_news_fts_delete '
+    f'AFTER DELETE ON news_news BEGIN {UNINDEX_NEWS} END',
+    'CREATE TRIGGER news_comment_fts_insert '
+    f'AFTER INSERT ON news_comment BEGIN {INDEX_COMMENT} END',
+    'CREATE TRIGGER news_comment_fts_update '
+    'AFTER UPDATE OF text, status, news_id ON news_comment '
+    f'BEGIN {UNINDEX_COMMENT} {INDEX_COMMENT} END',
+    'CREATE TRIGGER news_comment_fts_delete '
+    f'AFTER DELETE ON news_comment BEGIN {UNINDEX_COMMENT} END',
+    'INSERT INTO news_news_fts (rowid, title, text) '
+    "SELECT id, replace(replace(title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM news_news",
+    'INSERT INTO news_comment_fts (rowid, text, news_id) '
+    "SELECT id, replace(replace(text, 'ё', 'е'), 'Ё', 'Е'), news_id "
+    "FROM news_comment WHERE status = 'approved'",
+]
+DROP = [
+    f'DROP TRIGGER IF EXISTS {name}_{event}'
+    for name in ('news_news_fts', 'news_comment_fts')
+    for event in ('insert', 'update', 'delete')
+] + [
+    'DROP TABLE IF EXISTS news_news_fts',
+    'DROP TABLE IF EXISTS news_comment_fts',
+]
+
+
+class RunSearchSQL(migrations.RunSQL):
+    """
+    RunSQL только для SQLite с модулем FTS5.
+
+    На других базах индекса нет, а поиск работает по подстроке.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if search_supported(schema_editor.connection):
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if search_supported(schema_editor.connection):
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_comment_submitted'),
+    ]
+
+    operations = [
+        RunSearchSQL(CREATE, DROP),
+    ]
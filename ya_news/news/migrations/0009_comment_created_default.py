@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 19:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_search_index'),
+    ]
+
+    # Столбец в базе не меняется: значение по умолчанию задаёт Python.
+    # Обычный AlterField пересоздал бы таблицу в SQLite, а вместе с ней
+    # удалил бы триггеры поискового индекса.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='comment',
+                    name='created',
+                    field=models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,37 +1,231 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def with_actual_comment_count(self):
+        """
+        Добавляет к новостям фактическое количество одобренных комментариев.
+
+        Комментарии считаются одним агрегирующим запросом,
+        сами объекты комментариев при этом не загружаются.
+        """
+        return self.annotate(actual_comment_count=models.Count(
+            'comment',
+            filter=models.Q(comment__status=Comment.Status.APPROVED),
+        ))
+
+    def touch(self, comment_delta=0):
+        """
+        Отмечает изменение новостей.
+
+        Увеличивает версию новостей и атомарно сдвигает
+        счётчик комментариев на comment_delta.
+        """
+        return self.update(
+            version=models.F('version') + 1,
+            comment_count=models.F('comment_count') + comment_delta,
+        )
+
+    def sync_comment_count(self):
+        """Пересчитывает счётчик по одобренным комментариям."""
+        counted = Comment.objects.filter(
+            news=models.OuterRef('pk'), status=Comment.Status.APPROVED
+        ).order_by().values('news').annotate(
+            total=models.Count('pk')
+        ).values('total')
+        return self.update(
+            version=models.F('version') + 1,
+            comment_count=Coalesce(models.Subquery(counted), 0),
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Счётчик одобренных комментариев. Его меняют Comment.save(),
+    # Comment.delete(), touch() и sync_comment_count(); News.save()
+    # его не записывает. Comment.objects.bulk_create(), удаление
+    # комментариев через queryset и update() статуса счётчик обходят:
+    # после них вызывают sync_comment_count(), как import_comments
+    # и модерация.
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=1,
+        editable=False,
+        help_text='Увеличивается при каждом изменении новости '
+                  'или её комментариев',
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            # Главная страница: последние новости по дате.
+            models.Index(fields=('-date', 'id'), name='news_news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    @property
+    def has_comments(self):
+        return self.comment_count > 0
+
+    def save(self, *args, **kwargs):
+        """
+        При изменении новости увеличиваем её версию.
+
+        Счётчик комментариев при изменении не записывается: значение
+        в объекте могло устареть, пока его меняли комментарии.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+            ]
+        kwargs['update_fields'] = (
+            {*update_fields, 'version'} - {'comment_count'}
+        )
+        self.version = models.F('version') + 1
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=('version', 'comment_count'))
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """Одобренные комментарии и собственные ожидающие модерации."""
+        visible = models.Q(status=Comment.Status.APPROVED)
+        if user.is_authenticated:
+            visible |= models.Q(status=Comment.Status.PENDING, author=user)
+        return self.filter(visible)
+
 
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        APPROVED = 'approved', 'Одобрен'
+        REJECTED = 'rejected', 'Отклонён'
+
+    # Отдельные индексы внешних ключей не нужны: их заменяют
+    # составные индексы, которые начинаются с этих полей.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    submitted = models.DateTimeField(
+        'Отправлен на модерацию',
+        default=timezone.now,
+        editable=False,
+        help_text='Время отправки текущей версии текста: обновляется '
+                  'при каждом возврате комментария на модерацию',
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.APPROVED,
+        help_text='Комментарии пользователей сначала попадают на модерацию',
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    # Статус, записанный в базе: по нему видно, учтён ли комментарий
+    # в счётчике новости.
+    _saved_status = None
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('id',),
+                condition=models.Q(status='pending'),
+                name='news_comment_pending_idx',
+            ),
+            # Комментарии новости в хронологическом порядке
+            # и постраничная подгрузка по курсору (created, id).
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='news_comment_news_idx',
+            ),
+            # Комментарии автора за последнее время при модерации.
+            models.Index(
+                fields=('author', 'submitted'),
+                name='news_comment_author_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = instance.__dict__.get('status')
+        return instance
+
+    @property
+    def is_approved(self):
+        return self.status == self.Status.APPROVED
+
+    def save(self, *args, **kwargs):
+        """Сохраняет комментарий и учитывает его в счётчике новости."""
+        if self.status == self.Status.PENDING:
+            self.submitted = timezone.now()
+        comment_delta = (
+            int(self.is_approved)
+            - int(self._saved_status == self.Status.APPROVED)
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            News.objects.filter(pk=self.news_id).touch(comment_delta)
+        self._saved_status = self.status
+
+    def delete(self, *args, **kwargs):
+        """Удаляет комментарий и уменьшает счётчик новости."""
+        comment_delta = -int(self._saved_status == self.Status.APPROVED)
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            News.objects.filter(pk=self.news_id).touch(comment_delta)
+        return deleted
+
+
+class BannedWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+    # По индексу версия словаря считается без чтения самой таблицы.
+    changed = models.DateTimeField('Изменено', auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name = 'Запрещённое слово'
+        verbose_name_plural = 'Запрещённые слова'
+
+    def __str__(self):
+        return self.word
@@ -0,0 +1,94 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from .forms import banned_words
+from .models import Comment, News
+
+BATCH_SIZE = 100
+LINK_PATTERN = re.compile(r'(?:https?://|www\.)\S+', re.IGNORECASE)
+# Не больше RATE_LIMIT комментариев одного автора за RATE_WINDOW.
+RATE_LIMIT = 5
+RATE_WINDOW = timedelta(minutes=1)
+
+
+def get_recent_activity(comments):
+    """
+    Время отправки недавних комментариев авторов пачки.
+
+    Один запрос на пачку: для каждого автора возвращается
+    отсортированный список времени отправки его комментариев.
+    Порядок (автор, время) совпадает с индексом и не требует
+    сортировки.
+    """
+    authors = {comment.author_id for comment in comments}
+    since = min(comment.submitted for comment in comments) - RATE_WINDOW
+    activity = defaultdict(list)
+    recent = Comment.objects.filter(
+        author__in=authors, submitted__gte=since
+    ).order_by('author', 'submitted').values_list('author', 'submitted')
+    for author, submitted in recent:
+        activity[author].append(submitted)
+    return activity
+
+
+def check_comment(comment, activity):
+    """Решение модерации по одному комментарию."""
+    if banned_words.search(comment.text):
+        return Comment.Status.REJECTED
+    if LINK_PATTERN.search(comment.text):
+        return Comment.Status.REJECTED
+    # Окно отсчитывается от отправки проверяемой версии текста.
+    # Комментарии, отправленные в ту же микросекунду, тоже учитываются,
+    # сам проверяемый комментарий -- нет.
+    submitted = activity[comment.author_id]
+    in_window = (
+        bisect_right(submitted, comment.submitted)
+        - bisect_left(submitted, comment.submitted - RATE_WINDOW)
+        - 1
+    )
+    if in_window >= RATE_LIMIT:
+        return Comment.Status.REJECTED
+    return Comment.Status.APPROVED
+
+
+def moderate_batch(batch_size=BATCH_SIZE):
+    """
+    Проверяет очередную пачку комментариев, ожидающих модерации.
+
+    Очередью служат сами комментарии в статусе «на модерации».
+    Статус меняется только у тех, кто всё ещё ждёт проверки той же
+    версии текста: комментарий, изменённый автором после чтения
+    пачки, остаётся на модерации до следующего прохода. Счётчики
+    затронутых новостей пересчитываются целиком, поэтому повторная
+    обработка той же пачки безопасна.
+    Возвращает количество комментариев по применённым решениям.
+    """
+    comments = list(
+        Comment.objects.filter(
+            status=Comment.Status.PENDING
+        ).order_by('pk')[:batch_size]
+    )
+    if not comments:
+        return {}
+    activity = get_recent_activity(comments)
+    decisions = defaultdict(list)
+    for comment in comments:
+        decisions[check_comment(comment, activity)].append(comment)
+    applied = {}
+    with transaction.atomic():
+        for status, checked in decisions.items():
+            versions = Q()
+            for comment in checked:
+                versions |= Q(pk=comment.pk, submitted=comment.submitted)
+            applied[status] = Comment.objects.filter(
+                versions, status=Comment.Status.PENDING
+            ).update(status=status)
+        News.objects.filter(
+            pk__in={comment.news_id for comment in comments}
+        ).sync_comment_count()
+    return applied
@@ -0,0 +1,74 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(comment):
+    """Упаковывает позицию комментария в непрозрачную строку."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, pk) из строки курсора."""
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        created, pk = raw.split(CURSOR_SEPARATOR)
+        return datetime.fromisoformat(created), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest('Некорректный курсор комментариев')
+
+
+class CommentPage:
+    """
+    Порция комментариев, выбранная по курсору (keyset-пагинация).
+
+    Комментарии упорядочены по паре (created, id), поэтому каждая
+    страница читается одним ограниченным запросом независимо от того,
+    насколько далеко она от начала обсуждения.
+    Запрос выполняется только при первом обращении к comments.
+    """
+
+    def __init__(self, queryset, cursor=None, per_page=None):
+        self.queryset = queryset.order_by('created', 'pk')
+        self.cursor = cursor
+        self.per_page = per_page or settings.COMMENTS_COUNT_ON_PAGE
+
+    def _page_queryset(self):
+        queryset = self.queryset
+        if self.cursor:
+            created, pk = decode_cursor(self.cursor)
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            )
+        return queryset[:self.per_page + 1]
+
+    @cached_property
+    def _rows(self):
+        return list(self._page_queryset())
+
+    async def afetch(self):
+        """Загружает страницу заранее, из асинхронного кода."""
+        self._rows = [comment async for comment in self._page_queryset()]
+
+    @property
+    def comments(self):
+        return self._rows[:self.per_page]
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.per_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return encode_cursor(self.comments[-1])
@@ -1,57 +1,164 @@
+from types import SimpleNamespace
+
 import pytest
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connection
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from news.models import News, Comment
+from news.search import create_search_index
 from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
 
+QUERY_BUDGET_DATA_SIZES = (1, 10, 50)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш страниц не должен переживать отдельный тест."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def login_session(user):
+    """Сохранённая сессия вошедшего пользователя, как после force_login."""
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Тестовая база строится без миграций: индекс поиска создаётся здесь."""
+    with django_db_blocker.unblock():
+        create_search_index()
+
+
+def create_seed():
+    """Создаёт общие данные и возвращает их ключи."""
+    author, not_author = get_user_model().objects.bulk_create([
+        get_user_model()(username="Автор"),
+        get_user_model()(username="Не автор"),
+    ])
+    news = News.objects.create(title="Заголовок", text="Текст новости")
+    return SimpleNamespace(
+        author_id=author.pk,
+        not_author_id=not_author.pk,
+        news_id=news.pk,
+        sessions={
+            user.pk: login_session(user) for user in (author, not_author)
+        },
+    )
+
+
+# Был ли тест с transaction=True: после него база очищена целиком.
+SEED_STATE = SimpleNamespace(flushed=False)
+
+
+@pytest.fixture(autouse=True)
+def track_flush(request):
+    yield
+    marker = request.node.get_closest_marker("django_db")
+    if "transactional_db" in request.fixturenames or (
+        marker and marker.kwargs.get("transaction")
+    ):
+        SEED_STATE.flushed = True
+
+
+@pytest.fixture(scope="session")
+def session_seed(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return create_seed()
+
 
 @pytest.fixture
-def author(django_user_model):
-    return django_user_model.objects.create(username="Автор")
+def seed(session_seed):
+    """
+    Общие данные, загруженные в тестовую базу один раз за сессию:
+    автор, не автор, их сессии и новость.
+
+    Каждый тест идёт в транзакции, которая откатывается после него,
+    поэтому изменения общих данных не видны другим тестам. Тест
+    с transaction=True после себя очищает всю базу, вместе с общими
+    данными: после него они создаются заново для каждого теста.
+    """
+    if SEED_STATE.flushed and not News.objects.filter(
+        pk=session_seed.news_id
+    ).exists():
+        vars(session_seed).update(vars(create_seed()))
+    return session_seed
 
 
 @pytest.fixture
-def not_author(django_user_model):
-    return django_user_model.objects.create(username="Не автор")
+def author(seed, django_user_model):
+    return django_user_model.objects.get(pk=seed.author_id)
 
 
 @pytest.fixture
-def author_client(author):
-    client = Client()
-    client.force_login(author)
-    return client
+def not_author(seed, django_user_model):
+    return django_user_model.objects.get(pk=seed.not_author_id)
 
 
 @pytest.fixture
-def not_author_client(not_author):
-    client = Client()
-    client.force_login(not_author)
-    return client
+def client_for(seed):
+    """
+    Клиент, уже вошедший под пользователем.
+
+    Для общих пользователей берётся их сохранённая сессия,
+    остальные входят через force_login.
+    """
+    def make_client(user):
+        client = Client()
+        if user.pk in seed.sessions:
+            client.cookies[settings.SESSION_COOKIE_NAME] = (
+                seed.sessions[user.pk]
+            )
+        else:
+            client.force_login(user)
+        return client
+    return make_client
 
 
 @pytest.fixture
-def news():
-    news = News.objects.create(
-        title="Заголовок",
-        text="Текст новости",
-    )
-    return news
+def author_client(client_for, author):
+    return client_for(author)
+
+
+@pytest.fixture
+def not_author_client(client_for, not_author):
+    return client_for(not_author)
+
+
+@pytest.fixture
+def news(seed):
+    return News.objects.get(pk=seed.news_id)
 
 
 @pytest.fixture
 def lots_of_news():
-    for i in range(1, NEWS_COUNT_ON_HOME_PAGE + 1):
-        News.objects.create(title=f"Заголовок {i}", text=f"Текст {i}")
-    return News.objects.all()
+    created = News.objects.bulk_create(
+        News(title=f"Заголовок {i}", text=f"Текст {i}")
+        for i in range(1, NEWS_COUNT_ON_HOME_PAGE + 1)
+    )
+    return News.objects.filter(pk__in=[news.pk for news in created])
 
 
 @pytest.fixture
 def lots_of_comments(news, author):
-    for i in range(1, 11):
-        Comment.objects.create(
-            news=news, author=author, text=f"Комментарий {i}"
-        )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f"Комментарий {i}")
+        for i in range(1, 11)
+    )
+    News.objects.filter(pk=news.pk).sync_comment_count()
     return Comment.objects.all()
 
 
@@ -90,6 +197,16 @@ def news_detail_url(id_for_args):
     return reverse("news:detail", args=id_for_args)
 
 
+@pytest.fixture
+def async_home_page_url():
+    return reverse("news:async_home")
+
+
+@pytest.fixture
+def async_news_detail_url(id_for_args):
+    return reverse("news:async_detail", args=id_for_args)
+
+
 @pytest.fixture
 def user_login_url():
     return reverse("users:login")
@@ -113,3 +230,33 @@ def news_edit_url(id_post_for_args):
 @pytest.fixture
 def news_delete_url(id_post_for_args):
     return reverse("news:delete", args=id_post_for_args)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка числа SQL-запросов на растущих объёмах данных.
+
+    Возвращает функцию check(make_request, grow, budget): для каждого
+    размера из sizes вызывается grow(size), который доращивает данные,
+    затем make_request(), у которого считаются запросы. Проверка
+    падает, если число запросов зависит от объёма данных
+    или превышает budget. Кэш страниц перед каждым запросом
+    очищается, чтобы измерялась полная отрисовка.
+    """
+    def check(make_request, grow, budget, sizes=QUERY_BUDGET_DATA_SIZES):
+        counts = {}
+        for size in sizes:
+            grow(size)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                make_request()
+            counts[size] = len(queries)
+        assert len(set(counts.values())) == 1, (
+            f"Число запросов растёт с объёмом данных: {counts}"
+        )
+        assert counts[sizes[0]] <= budget, (
+            f"Запросов {counts[sizes[0]]}, а бюджет {budget}"
+        )
+        return counts[sizes[0]]
+    return check
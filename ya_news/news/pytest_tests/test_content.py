@@ -1,6 +1,16 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from django.utils import timezone
 
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.search import SEARCH_CANDIDATES
 from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
 
 
@@ -47,6 +57,47 @@ def test_comments_order_on_news_detail(
     ), "Комментарии на странице отдельной новости не отсортированы по дате"
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("comments_per_page", (3, 4, 10))
+def test_comments_order_across_pages(
+    client, settings, news, lots_of_comments, news_detail_url,
+    comments_per_page,
+):
+    """
+    Проверяем, что при постраничной подгрузке комментарии
+    идут в хронологическом порядке без пропусков и повторов,
+    в том числе когда у комментариев совпадает время создания.
+    """
+    settings.COMMENTS_COUNT_ON_PAGE = comments_per_page
+    lots_of_comments.update(created=lots_of_comments.first().created)
+    page = client.get(news_detail_url).context["comments_page"]
+    loaded = list(page.comments)
+    assert len(loaded) == comments_per_page, (
+        "На странице новости выведены не только первые комментарии"
+    )
+    comments_url = reverse("news:comments", args=(news.id,))
+    while page.has_next:
+        response = client.get(comments_url, {"cursor": page.next_cursor})
+        page = response.context["comments_page"]
+        loaded.extend(page.comments)
+    expected = list(Comment.objects.order_by("created", "id"))
+    assert loaded == expected, (
+        "Комментарии, загруженные по страницам, не совпадают"
+        " с комментариями в хронологическом порядке"
+    )
+
+
+@pytest.mark.django_db
+def test_comments_page_with_broken_cursor(client, news):
+    """Проверяем, что некорректный курсор приводит к ошибке 400."""
+    response = client.get(
+        reverse("news:comments", args=(news.id,)), {"cursor": "не курсор"}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST, (
+        "Некорректный курсор не привёл к ошибке 400"
+    )
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "user_login_type, expected_answer",
@@ -73,3 +124,173 @@ def test_comment_form_visibility(
             "Форма для отправки комментария авторизованным пользователем"
             " не является формой CommentForm"
         )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "sync_url, async_url",
+    (
+        (
+            pytest.lazy_fixture("home_page_url"),
+            pytest.lazy_fixture("async_home_page_url"),
+        ),
+        (
+            pytest.lazy_fixture("news_detail_url"),
+            pytest.lazy_fixture("async_news_detail_url"),
+        ),
+    ),
+)
+def test_async_pages_match_sync(
+    client, lots_of_news, lots_of_comments, sync_url, async_url
+):
+    """
+    Проверяем, что асинхронные страницы под ASGI совпадают
+    с синхронными.
+    """
+    expected = client.get(sync_url)
+    response = async_to_sync(AsyncClient().get)(async_url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Страница {async_url} недоступна"
+    )
+    assert response.content == expected.content, (
+        f"Страница {async_url} отличается от {sync_url}"
+    )
+    assert response["ETag"] == expected["ETag"], "ETag страниц различается"
+
+
+@pytest.mark.django_db
+def test_async_detail_of_news_deleted_during_request(client, news):
+    """
+    Проверяем, что новость, удалённая после проверки её версии,
+    даёт ответ 404, а не ошибку сервера.
+    """
+    async def stale_state(request, pk):
+        request._news_detail_state = news.version
+        return news.version
+
+    url = reverse("news:async_detail", args=(news.pk,))
+    news.delete()
+    with mock.patch("news.views.aget_detail_state", stale_state):
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_detail_for_author(
+    author_client, news, author, async_news_detail_url
+):
+    """
+    Проверяем, что на асинхронной странице новости автор видит
+    форму и свой комментарий на модерации.
+    """
+    Comment.objects.create(
+        news=news, author=author, text="На модерации",
+        status=Comment.Status.PENDING,
+    )
+    response = author_client.get(async_news_detail_url)
+    assert isinstance(response.context["form"], CommentForm), (
+        "Автору не показана форма комментария"
+    )
+    assert "На модерации" in response.content.decode(), (
+        "Автору не показан его комментарий на модерации"
+    )
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_highlights_results(client, news, author):
+    """
+    Проверяем, что совпадение в заголовке выше совпадения в тексте,
+    а оно выше совпадения в комментарии, и что фрагменты
+    экранированы, а найденные слова выделены.
+    """
+    in_title = News.objects.create(title="Ёлка на площади", text="Текст")
+    in_text = News.objects.create(
+        title="Праздник", text="<b>Главная</b> ёлка города"
+    )
+    Comment.objects.create(news=news, author=author, text="Видел ёлку и ёлка")
+    response = client.get(reverse("news:search"), {"q": "Елка"})
+    results = response.context["search_page"].results
+    assert results == [in_title, in_text, news], (
+        "Результаты поиска упорядочены не по релевантности"
+    )
+    assert results[1].highlighted == (
+        "&lt;b&gt;Главная&lt;/b&gt; <mark>елка</mark> города"
+    ), "Фрагмент текста не экранирован или слово не выделено"
+    assert results[2].match_source == "comment"
+
+
+@pytest.mark.django_db
+def test_search_pages(client, settings):
+    """Проверяем, что страницы поиска покрывают все найденные новости."""
+    settings.NEWS_SEARCH_RESULTS_ON_PAGE = 3
+    created = News.objects.bulk_create(
+        News(title=f"Выборы {i}", text="Текст") for i in range(7)
+    )
+    url = reverse("news:search")
+    found = []
+    number = 1
+    while True:
+        response = client.get(url, {"q": "выборы", "page": number})
+        page = response.context["search_page"]
+        found.extend(page.results)
+        if not page.has_next:
+            break
+        number += 1
+    assert sorted(news.pk for news in found) == sorted(
+        news.pk for news in created
+    ), "Страницы поиска пропускают или повторяют новости"
+
+
+@pytest.mark.django_db
+def test_search_ranks_all_matches(client, settings):
+    """
+    Проверяем, что старая новость с точным совпадением в заголовке
+    выше тысяч более новых упоминаний слова в тексте, а выдача
+    отмечает, что ранжированы не все совпадения.
+    """
+    settings.NEWS_SEARCH_RESULTS_ON_PAGE = 1
+    old = News.objects.create(
+        title="Выборы", text="Итоги",
+        date=timezone.now() - timedelta(days=365),
+    )
+    News.objects.bulk_create(
+        News(title=f"Новость {i}", text="Говорили и про выборы")
+        for i in range(SEARCH_CANDIDATES)
+    )
+    response = client.get(reverse("news:search"), {"q": "выборы"})
+    assert response.context["search_page"].results == [old], (
+        "Ранжируются не все совпадения, а только самые новые"
+    )
+    assert response.context["search_page"].truncated, (
+        "Не отмечено, что показаны не все совпадения"
+    )
+
+
+@pytest.mark.django_db
+def test_search_without_full_text_index(client, news, author):
+    """
+    Проверяем, что на базе без FTS5 поиск находит новости по заголовку,
+    тексту и одобренным комментариям, новые -- первыми.
+    """
+    in_text = News.objects.create(title="Праздник", text="Ёлка города")
+    Comment.objects.create(news=news, author=author, text="Видел Елку")
+    Comment.objects.create(
+        news=in_text, author=author, text="Елку убрали",
+        status=Comment.Status.PENDING,
+    )
+    with mock.patch("news.search.search_supported", return_value=False):
+        response = client.get(reverse("news:search"), {"q": "Ёлк"})
+    assert response.status_code == HTTPStatus.OK
+    results = response.context["search_page"].results
+    assert results == [in_text, news], "Поиск по подстроке не сработал"
+    assert [news.match_source for news in results] == ["news", "comment"]
+    assert results[1].highlighted == "Видел Елку"
+
+
+@pytest.mark.django_db
+def test_search_with_broken_page(client):
+    """Проверяем, что некорректный номер страницы приводит к ошибке 400."""
+    response = client.get(reverse("news:search"), {"q": "ёлка", "page": "0"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST, (
+        "Некорректный номер страницы не привёл к ошибке 400"
+    )
@@ -1,10 +1,32 @@
+import sqlite3
+import threading
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection, router
+from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects, assertFormError
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news import moderation
+from news.banned_words import BannedWordsMatcher, BannedWordsRegistry
+from news.forms import BAD_WORDS, WARNING, CommentForm, banned_words
+from news.models import BannedWord, Comment, News
+from news.middleware import ReadReplicaMiddleware
+from news.moderation import RATE_LIMIT, moderate_batch
+from news.replication import copy_database
+from news.routers import RoutingState, routing_state
+from news.search import SearchPage
+
+# Сколько секунд ждать, пока потоки перечитают словарь.
+RELOAD_TIMEOUT = 10
 
 
 @pytest.mark.django_db
@@ -115,3 +137,625 @@ def test_user_cant_delete_others_comment(not_author_client, news_delete_url):
         response.status_code == HTTPStatus.NOT_FOUND
     ), "Пользователь может удалить чужой комментарий"
     assert Comment.objects.count() == 1, "Комментарий был удален"
+
+
+def test_comment_count_follows_comment_create_and_delete(
+    author_client, news, form_data, news_detail_url
+):
+    """
+    Проверяем, что счётчик комментариев новости растёт,
+    когда комментарий проходит модерацию, и уменьшается при удалении.
+    """
+    author_client.post(news_detail_url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 0, "Учтён комментарий без модерации"
+    moderate_batch()
+    news.refresh_from_db()
+    assert news.comment_count == 1, "Счётчик не увеличился"
+    comment = Comment.objects.get()
+    author_client.post(reverse("news:delete", args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0, "Счётчик не уменьшился"
+
+
+@pytest.mark.django_db
+def test_news_save_keeps_comment_count(news, comment):
+    """
+    Проверяем, что сохранение новости с устаревшим счётчиком
+    не затирает комментарии, добавленные после её загрузки.
+    """
+    stale = News.objects.get(pk=news.pk)
+    Comment.objects.create(news=news, author=comment.author, text="Ещё")
+    stale.title = "Новый заголовок"
+    stale.save()
+    assert stale.comment_count == 2, "Счётчик в объекте не обновлён"
+    news.refresh_from_db()
+    assert (news.title, news.comment_count) == ("Новый заголовок", 2)
+
+
+@pytest.mark.django_db
+def test_rebuild_comment_counts_fixes_drift(news, lots_of_comments):
+    """
+    Проверяем, что команда rebuild_comment_counts находит
+    расхождения счётчиков и исправляет их.
+    """
+    News.objects.filter(pk=news.pk).update(comment_count=0)
+    with pytest.raises(CommandError):
+        call_command("rebuild_comment_counts", "--check", stdout=StringIO())
+    call_command("rebuild_comment_counts", stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == lots_of_comments.count(), (
+        "Счётчик комментариев не пересчитан"
+    )
+    call_command("rebuild_comment_counts", "--check", stdout=StringIO())
+
+
+@pytest.mark.parametrize(
+    "text, options, expected",
+    (
+        ("Ну ты и РЕДИСКА!", {}, "редиска"),
+        ("Редисками не ругаются", {}, "редиска"),
+        ("Редисками не ругаются", {"whole_words": True}, None),
+        ("Ты редиска, понял?", {"whole_words": True}, "редиска"),
+        ("Вот ЁЖИК", {}, "ежик"),
+        ("Вот ЁЖИК", {"fold_yo": False}, None),
+        ("Хороший комментарий", {}, None),
+    ),
+)
+def test_banned_words_matcher(text, options, expected):
+    """
+    Проверяем поиск запрещённых слов с учётом границ слов
+    и без различия регистра, «ё» и «е».
+    """
+    matcher = BannedWordsMatcher(("редиска", "ежик", "редис ка"), **options)
+    assert matcher.search(text) == expected, (
+        f"Для текста «{text}» найдено не то запрещённое слово"
+    )
+
+
+@pytest.fixture
+def fresh_banned_words():
+    """Словарь перечитывается в начале и в конце теста."""
+    banned_words.expire()
+    yield banned_words
+    banned_words.expire()
+
+
+@pytest.mark.django_db
+def test_banned_words_from_database(fresh_banned_words):
+    """
+    Проверяем, что слова, добавленные в базу, начинают
+    отклоняться после проверки версии словаря, а удалённые
+    перестают.
+    """
+    data = {"text": "Ты подлец"}
+    assert CommentForm(data=data).is_valid(), "Комментарий отклонён"
+    word = BannedWord.objects.create(word="Подлец")
+    fresh_banned_words.expire()
+    form = CommentForm(data=data)
+    assert not form.is_valid(), "Слово из базы не учитывается"
+    assert form.errors["text"] == [WARNING]
+    word.delete()
+    fresh_banned_words.expire()
+    assert CommentForm(data=data).is_valid(), (
+        "Удалённое из базы слово всё ещё учитывается"
+    )
+
+
+@pytest.mark.django_db
+def test_banned_words_not_reloaded_on_every_validation(
+    fresh_banned_words, django_assert_num_queries
+):
+    """
+    Проверяем, что в пределах интервала проверки словарь
+    не запрашивается из базы при каждой проверке комментария.
+    """
+    CommentForm(data={"text": "Текст"}).is_valid()
+    with django_assert_num_queries(0):
+        for _ in range(10):
+            CommentForm(data={"text": "Текст"}).is_valid()
+
+
+@pytest.mark.django_db
+def test_banned_words_interval_read_from_settings(
+    fresh_banned_words, settings, django_assert_num_queries
+):
+    """
+    Проверяем, что интервал проверки словаря берётся из текущих
+    настроек, а не из настроек на момент импорта.
+    """
+    CommentForm(data={"text": "Текст"}).is_valid()
+    settings.BANNED_WORDS_CHECK_INTERVAL = 0
+    with django_assert_num_queries(1):
+        CommentForm(data={"text": "Текст"}).is_valid()
+
+
+def test_banned_words_reload_during_validation():
+    """
+    Проверяем, что словарь можно менять, пока другие потоки
+    проверяют тексты: проверки не падают и видят либо старый,
+    либо новый словарь целиком, а слова перечитываются
+    только при смене версии.
+    """
+    dictionary = {"version": 0, "words": ("редиска",), "loads": 0}
+    loaded = threading.Event()
+
+    def get_words():
+        dictionary["loads"] += 1
+        loaded.set()
+        return dictionary["words"]
+
+    registry = BannedWordsRegistry(
+        lambda: dictionary["version"], get_words, interval=0
+    )
+    errors = []
+    stop = threading.Event()
+
+    def validate():
+        while not stop.is_set():
+            try:
+                found = registry.search("редиска и негодяй")
+                assert found in ("редиска", "негодяй")
+            except Exception as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target=validate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for version in range(1, 22):
+        words = ("негодяй",) if version % 2 else ("редиска",)
+        loaded.clear()
+        dictionary["words"] = words + tuple(f"слово{i}" for i in range(100))
+        dictionary["version"] = version
+        if not loaded.wait(timeout=RELOAD_TIMEOUT):
+            stop.set()
+            pytest.fail(f"Словарь версии {version} не перечитан")
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors, f"Проверка текста упала при перезагрузке: {errors[0]}"
+    assert dictionary["loads"] <= 22, "Словарь перечитывался без смены версии"
+    assert registry.search("ты негодяй") == "негодяй"
+
+
+def test_pending_comment_visible_only_to_author(
+    author_client, not_author_client, client, form_data, news_detail_url
+):
+    """
+    Проверяем, что комментарий на модерации видит только его автор,
+    а после проверки обработчиком очереди — все пользователи.
+    """
+    author_client.post(news_detail_url, data=form_data)
+    comment = Comment.objects.get()
+    assert comment.status == Comment.Status.PENDING, (
+        "Новый комментарий не отправлен на модерацию"
+    )
+    expected_visibility = (
+        (author_client, True),
+        (not_author_client, False),
+        (client, False),
+    )
+    for user_client, expected in expected_visibility:
+        page = user_client.get(news_detail_url).context["comments_page"]
+        assert (comment in page.comments) is expected, (
+            "Видимость комментария на модерации не соответствует ожидаемой"
+        )
+    call_command("moderate_comments", stdout=StringIO())
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.APPROVED, "Комментарий не одобрен"
+    page = client.get(news_detail_url).context["comments_page"]
+    assert comment in page.comments, "Одобренный комментарий не виден"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "text",
+    (
+        "Смотрите https://example.com",
+        "Заходите на www.example.com",
+        "Ты подлец",
+    ),
+)
+def test_moderation_rejects_comments(
+    news, author, fresh_banned_words, text
+):
+    """
+    Проверяем, что модерация отклоняет ссылки и слова,
+    добавленные в словарь уже после публикации комментария.
+    """
+    comment = Comment.objects.create(
+        news=news, author=author, text=text, status=Comment.Status.PENDING
+    )
+    BannedWord.objects.create(word="подлец")
+    fresh_banned_words.expire()
+    moderate_batch()
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED, (
+        "Комментарий не отклонён модерацией"
+    )
+    assert news.comment_count == 0, "Отклонённый комментарий учтён"
+
+
+@pytest.mark.django_db
+def test_moderation_rejects_comment_flood(news, author):
+    """
+    Проверяем, что модерация отклоняет комментарии автора,
+    превысившего лимит комментариев за минуту.
+    """
+    Comment.objects.bulk_create(
+        Comment(
+            news=news, author=author, text=f"Комментарий {i}",
+            status=Comment.Status.PENDING,
+        )
+        for i in range(RATE_LIMIT + 2)
+    )
+    moderate_batch()
+    statuses = list(Comment.objects.order_by("pk").values_list(
+        "status", flat=True
+    ))
+    assert statuses == (
+        [Comment.Status.APPROVED] * RATE_LIMIT
+        + [Comment.Status.REJECTED] * 2
+    ), "Лимит комментариев за минуту не соблюдается"
+
+
+@pytest.mark.django_db
+def test_moderation_limits_comments_sent_at_once(news, author):
+    """
+    Проверяем, что лимит учитывает комментарии, отправленные
+    в одну и ту же микросекунду.
+    """
+    submitted = timezone.now()
+    Comment.objects.bulk_create(
+        Comment(
+            news=news, author=author, text=f"Комментарий {i}",
+            status=Comment.Status.PENDING, submitted=submitted,
+        )
+        for i in range(RATE_LIMIT + 1)
+    )
+    moderate_batch()
+    assert not Comment.objects.exclude(
+        status=Comment.Status.REJECTED
+    ).exists(), "Одновременные комментарии не ограничены"
+
+
+@pytest.mark.django_db
+def test_moderation_counts_edit_time(news, author):
+    """
+    Проверяем, что изменённый комментарий проверяется по времени
+    правки, а не по времени создания.
+    """
+    comment = Comment.objects.create(news=news, author=author, text="Старый")
+    Comment.objects.filter(pk=comment.pk).update(
+        created=timezone.now() - timedelta(hours=1)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f"Новый {i}")
+        for i in range(RATE_LIMIT)
+    )
+    comment.refresh_from_db()
+    comment.text = "Старый, но исправленный"
+    comment.status = Comment.Status.PENDING
+    comment.save()
+    moderate_batch()
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED, (
+        "Правка не учтена в лимите комментариев"
+    )
+
+
+@pytest.mark.django_db
+def test_moderation_skips_comment_edited_during_check(
+    author_client, news, author
+):
+    """
+    Проверяем, что решение модерации не применяется к тексту,
+    который автор изменил уже после того, как пачку прочитали.
+    """
+    comment = Comment.objects.create(
+        news=news, author=author, text="Проверенный текст",
+        status=Comment.Status.PENDING,
+    )
+    check = moderation.check_comment
+
+    def edit_during_check(checked, activity):
+        author_client.post(
+            reverse("news:edit", args=(checked.id,)),
+            data={"text": "Смотрите https://example.com"},
+        )
+        return check(checked, activity)
+
+    with mock.patch.object(
+        moderation, "check_comment", side_effect=edit_during_check
+    ):
+        decisions = moderate_batch()
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING, (
+        "Решение применено к непроверенному тексту"
+    )
+    assert decisions == {Comment.Status.APPROVED: 0}
+    moderate_batch()
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED, (
+        "Изменённый текст не проверен при следующем проходе"
+    )
+
+
+def found(query):
+    return list(SearchPage(query).results)
+
+
+@pytest.mark.django_db
+def test_search_index_follows_writes(author_client, news, comment):
+    """
+    Проверяем, что индекс поиска сразу отражает новые, изменённые
+    и удалённые новости и комментарии, а комментарии на модерации
+    в поиск не попадают.
+    """
+    assert found("комментария") == [news]
+    author_client.post(
+        reverse("news:edit", args=(comment.id,)), data={"text": "Снегопад"}
+    )
+    assert found("комментария") == [], "Комментарий на модерации найден"
+    assert found("снегопад") == []
+    moderate_batch()
+    assert found("снегопад") == [news], "Одобренный комментарий не найден"
+    news.refresh_from_db()
+    news.title = "Метель"
+    news.save()
+    assert found("метель") == [news]
+    author_client.post(reverse("news:delete", args=(comment.id,)))
+    assert found("снегопад") == [], "Удалённый комментарий найден"
+    news.delete()
+    assert found("метель") == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(news):
+    """Проверяем, что команда восстанавливает потерянный индекс."""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM news_news_fts")
+    assert found("заголовок") == []
+    call_command("rebuild_search_index", stdout=StringIO())
+    assert found("заголовок") == [news]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("extension", ("jsonl", "csv"))
+def test_export_import_round_trip(
+    tmp_path, extension, lots_of_comments, author, not_author
+):
+    """
+    Проверяем, что выгруженные новости и комментарии загружаются
+    обратно без потерь, а счётчики и поиск учитывают загруженное.
+    """
+    Comment.objects.create(
+        news=lots_of_comments[0].news, author=not_author, text="Спорно",
+        status=Comment.Status.REJECTED,
+    )
+    fields = ("id", "news_id", "author_id", "text", "created", "status")
+    expected_news = list(News.objects.values_list("id", "title", "date"))
+    expected_comments = list(Comment.objects.values_list(*fields))
+    news_file = tmp_path / f"news.{extension}"
+    comments_file = tmp_path / f"comments.{extension}"
+    call_command("export_news", news_file, stdout=StringIO())
+    call_command("export_comments", comments_file, stdout=StringIO())
+    News.objects.all().delete()
+    call_command("import_news", news_file, batch_size=3, stdout=StringIO())
+    call_command(
+        "import_comments", comments_file, batch_size=3, stdout=StringIO()
+    )
+    assert list(
+        News.objects.values_list("id", "title", "date")
+    ) == expected_news
+    assert list(Comment.objects.values_list(*fields)) == expected_comments
+    news = News.objects.get()
+    assert news.comment_count == Comment.objects.filter(
+        status=Comment.Status.APPROVED
+    ).count()
+    assert found("комментарий") == [news], "Загруженное не в индексе"
+
+
+@pytest.mark.django_db
+def test_import_comments_is_atomic(tmp_path, news, author):
+    """
+    Проверяем, что ошибка в записи отменяет весь импорт
+    и сообщает номер записи.
+    """
+    comments_file = tmp_path / "comments.jsonl"
+    comments_file.write_text(
+        f'{{"news": {news.id}, "author": "{author.username}", '
+        '"text": "Первый"}\n'
+        f'{{"news": {news.id}, "author": "Никто", "text": "Второй"}}\n',
+        encoding="utf-8",
+    )
+    with pytest.raises(CommandError, match="запись 2"):
+        call_command("import_comments", comments_file, batch_size=1)
+    assert not Comment.objects.exists(), "Импорт отменён не полностью"
+
+
+@pytest.mark.django_db
+def test_import_comments_resumes_with_skip(tmp_path, news, author):
+    """
+    Проверяем, что с --commit-batches загруженные пачки сохраняются
+    при ошибке, а --skip продолжает импорт с ошибочной записи.
+    """
+    comments_file = tmp_path / "comments.jsonl"
+    lines = [
+        f'{{"news": {news.id}, "author": "{author.username}", '
+        f'"text": "Комментарий {number}"}}\n'
+        for number in range(3)
+    ]
+    broken = lines[1].replace(author.username, "Никто")
+    comments_file.write_text(
+        lines[0] + broken + lines[2], encoding="utf-8"
+    )
+    with pytest.raises(CommandError, match="--skip 1"):
+        call_command(
+            "import_comments", comments_file, batch_size=1,
+            commit_batches=True,
+        )
+    assert Comment.objects.count() == 1, "Загруженная пачка не сохранена"
+    comments_file.write_text("".join(lines), encoding="utf-8")
+    call_command(
+        "import_comments", comments_file, batch_size=1, commit_batches=True,
+        skip=1, stdout=StringIO(),
+    )
+    assert list(
+        Comment.objects.order_by("id").values_list("text", flat=True)
+    ) == [f"Комментарий {number}" for number in range(3)]
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+
+def generated_dataset(news):
+    """Созданные generate_dataset новости и комментарии без ключей."""
+    generated_news = list(News.objects.exclude(pk=news.pk).order_by(
+        "id"
+    ).values_list("title", "text", "date", "comment_count"))
+    comments = list(Comment.objects.order_by("id").values_list(
+        "news__title", "author__username", "text", "status"
+    ))
+    return generated_news, comments
+
+
+@pytest.mark.django_db
+def test_generate_dataset_is_deterministic(news, django_user_model):
+    """
+    Проверяем, что синтетические данные повторяются при том же seed,
+    а комментарии распределены по новостям неравномерно.
+    """
+    options = {"users": 5, "news": 30, "comments": 300, "batch_size": 7}
+    call_command("generate_dataset", seed=1, stdout=StringIO(), **options)
+    dataset = generated_dataset(news)
+    generated_news, comments = dataset
+    assert (len(generated_news), len(comments)) == (30, 300)
+    counts = sorted((count for *_, count in generated_news), reverse=True)
+    assert counts[0] > 3 * counts[len(counts) // 2], (
+        "У популярных новостей не больше комментариев"
+    )
+    assert sum(counts) == sum(
+        status == Comment.Status.APPROVED for *_, status in comments
+    ), "Счётчики комментариев не пересчитаны"
+    with pytest.raises(CommandError):
+        call_command("generate_dataset", seed=1, stdout=StringIO(), **options)
+    assert generated_dataset(news) == dataset, (
+        "Неудачный запуск оставил данные"
+    )
+    News.objects.exclude(pk=news.pk).delete()
+    django_user_model.objects.filter(username__startswith="user").delete()
+    call_command("generate_dataset", seed=1, stdout=StringIO(), **options)
+    assert generated_dataset(news) == dataset
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.NEWS_READ_REPLICAS = ("replica",)
+    return settings
+
+
+def test_reads_go_to_replica_until_write(replicas, django_user_model):
+    """
+    Проверяем, что в запросе новости читаются с реплики,
+    пока запрос ничего не записал, а остальное -- с основной базы.
+    """
+    assert router.db_for_read(News) == "default", (
+        "Вне запроса чтение ушло на реплику"
+    )
+    token = routing_state.set(RoutingState(replica="replica"))
+    try:
+        assert router.db_for_read(News) == "replica"
+        assert router.db_for_read(django_user_model) == "default"
+        assert router.db_for_write(Comment) == "default"
+        assert router.db_for_read(Comment) == "default", (
+            "Чтение после записи ушло на реплику"
+        )
+    finally:
+        routing_state.reset(token)
+
+
+@pytest.mark.parametrize("lag, expected_db", ((60, "default"), (0, "replica")))
+@pytest.mark.parametrize("asynchronous", (False, True))
+def test_session_reads_primary_after_write(
+    rf, replicas, lag, expected_db, asynchronous
+):
+    """
+    Проверяем, что после записи сессия читает с основной базы,
+    пока не истечёт NEWS_REPLICATION_LAG, в синхронной
+    и в асинхронной цепочке middleware.
+    """
+    replicas.NEWS_REPLICATION_LAG = lag
+    session = SessionStore()
+    read_from = []
+
+    def write(request):
+        router.db_for_write(Comment)
+
+    def read(request):
+        read_from.append(router.db_for_read(News))
+
+    for get_response in (write, read):
+        request = rf.get("/")
+        request.session = session
+        if asynchronous:
+            middleware = ReadReplicaMiddleware(sync_to_async(get_response))
+            async_to_sync(middleware)(request)
+        else:
+            ReadReplicaMiddleware(get_response)(request)
+    assert read_from == [expected_db]
+
+
+@pytest.mark.parametrize("asynchronous", (False, True))
+def test_request_reads_from_one_replica(rf, replicas, asynchronous):
+    """
+    Проверяем, что при двух репликах все чтения одного запроса
+    идут с одной из них, а разные запросы распределяются по обеим.
+    """
+    replicas.NEWS_READ_REPLICAS = ("replica", "replica_2")
+    used = []
+
+    def read(request):
+        used.append({router.db_for_read(News) for _ in range(10)})
+
+    for _ in range(20):
+        request = rf.get("/")
+        request.session = SessionStore()
+        if asynchronous:
+            async_to_sync(ReadReplicaMiddleware(sync_to_async(read)))(request)
+        else:
+            ReadReplicaMiddleware(read)(request)
+    assert all(len(aliases) == 1 for aliases in used), (
+        "Чтения одного запроса ушли на разные реплики"
+    )
+    assert set().union(*used) == {"replica", "replica_2"}
+
+
+def test_copy_database(tmp_path):
+    """Проверяем, что копия базы для реплики содержит данные основной."""
+    primary = tmp_path / "primary.sqlite3"
+    replica = tmp_path / "replica.sqlite3"
+    with sqlite3.connect(primary) as database:
+        database.execute("CREATE TABLE news (title TEXT)")
+        database.execute("INSERT INTO news VALUES ('Заголовок')")
+    database.close()
+    copy_database(primary, replica)
+    database = sqlite3.connect(replica)
+    try:
+        assert database.execute("SELECT title FROM news").fetchall() == [
+            ("Заголовок",)
+        ]
+    finally:
+        database.close()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("run", (1, 2))
+def test_shared_data_survives_flush(run, author_client, news_detail_url):
+    """
+    Проверяем, что общие данные доступны и после теста
+    с transaction=True, который очищает базу.
+    """
+    response = author_client.get(news_detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["user"].username == "Автор"
@@ -0,0 +1,307 @@
+import tracemalloc
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from news.forms import banned_words
+from news.models import Comment, News
+from yanews import settings_production
+
+# Запросы записи: сессия, пользователь, выборка объекта,
+# изменение комментария, обновление счётчика новости.
+WRITE_QUERIES = 5
+MANY_COMMENTS = 10_000
+HOME_PAGE_MAX_QUERIES = 2
+HOME_PAGE_MAX_ALLOCATED_BYTES = 2 * 1024 * 1024
+
+
+@pytest.fixture
+def news_with_many_comments(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f"Комментарий {i}")
+        for i in range(MANY_COMMENTS)
+    )
+    News.objects.filter(pk=news.pk).sync_comment_count()
+    return news
+
+
+@pytest.mark.django_db
+def test_home_page_comment_count_is_aggregated(
+    client, home_page_url, news_with_many_comments,
+    django_assert_max_num_queries,
+):
+    """
+    Проверяем, что главная страница получает количество комментариев
+    одним агрегирующим запросом и не загружает сами комментарии.
+    """
+    client.get(home_page_url)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        with django_assert_max_num_queries(HOME_PAGE_MAX_QUERIES):
+            response = client.get(home_page_url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < HOME_PAGE_MAX_ALLOCATED_BYTES, (
+        f"Главная страница выделила {peak} байт памяти,"
+        " комментарии загружаются целиком"
+    )
+    news = response.context["object_list"][0]
+    assert news.comment_count == MANY_COMMENTS, (
+        "Количество комментариев на главной странице неверное"
+    )
+    assert f"Комментариев: {MANY_COMMENTS}" in response.content.decode()
+
+
+@pytest.fixture(params=("locmem", "filebased"))
+def page_cache(request, settings, tmp_path):
+    """Кэш страниц в памяти процесса и в файлах."""
+    if request.param == "filebased":
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased"
+                ".FileBasedCache",
+                "LOCATION": str(tmp_path),
+            }
+        }
+    return request.param
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name_url",
+    (
+        pytest.lazy_fixture("home_page_url"),
+        pytest.lazy_fixture("news_detail_url"),
+        pytest.lazy_fixture("async_home_page_url"),
+        pytest.lazy_fixture("async_news_detail_url"),
+    ),
+)
+def test_anonymous_pages_are_cached(
+    client, page_cache, comment, name_url, django_assert_max_num_queries
+):
+    """
+    Проверяем, что повторный запрос анонимного пользователя
+    отдаётся из кэша: без отрисовки шаблона и с одним
+    запросом версии данных.
+    """
+    first = client.get(name_url)
+    with django_assert_max_num_queries(1):
+        second = client.get(name_url)
+    assert second.context is None, "Страница отрисована повторно"
+    assert second.content == first.content, (
+        "Из кэша получена другая страница"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name_url",
+    (
+        pytest.lazy_fixture("home_page_url"),
+        pytest.lazy_fixture("news_detail_url"),
+    ),
+)
+def test_page_cache_invalidated_by_comment_writes(
+    client, author_client, page_cache, news, name_url,
+    news_detail_url, form_data,
+):
+    """
+    Проверяем, что создание, изменение и удаление комментария
+    сбрасывает кэш страниц для анонимного пользователя.
+    """
+    client.get(name_url)
+    author_client.post(news_detail_url, data={"text": "Первый"})
+    response = client.get(name_url)
+    assert response.context is not None, "Отдана устаревшая страница"
+    comment = Comment.objects.get()
+    author_client.post(
+        reverse("news:edit", args=(comment.id,)), data=form_data
+    )
+    assert client.get(name_url).context is not None, (
+        "Отдана устаревшая страница после изменения комментария"
+    )
+    author_client.post(reverse("news:delete", args=(comment.id,)))
+    response = client.get(name_url)
+    assert response.context is not None, (
+        "Отдана устаревшая страница после удаления комментария"
+    )
+
+
+@pytest.mark.django_db
+def test_comments_fragment_cached_for_user(
+    author_client, page_cache, lots_of_comments, news_detail_url
+):
+    """
+    Проверяем, что авторизованному пользователю список комментариев
+    отдаётся из кэша фрагмента, без запроса к таблице комментариев.
+    """
+    author_client.get(news_detail_url)
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(news_detail_url)
+    comment_queries = [
+        query["sql"] for query in queries
+        if '"news_comment"."text"' in query["sql"]
+    ]
+    assert not comment_queries, "Комментарии запрошены повторно"
+    content = response.content.decode()
+    for comment in lots_of_comments:
+        assert comment.text in content, (
+            "В кэше фрагмента нет комментария"
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name_url",
+    (
+        pytest.lazy_fixture("home_page_url"),
+        pytest.lazy_fixture("news_detail_url"),
+        pytest.lazy_fixture("async_home_page_url"),
+        pytest.lazy_fixture("async_news_detail_url"),
+    ),
+)
+def test_not_modified_without_rendering(
+    client, comment, name_url, django_assert_max_num_queries
+):
+    """
+    Проверяем, что повторный запрос с If-None-Match получает ответ 304
+    после одного небольшого запроса и без отрисовки шаблона.
+    """
+    etag = client.get(name_url)["ETag"]
+    cache.clear()
+    with django_assert_max_num_queries(1):
+        response = client.get(name_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        f"Страница {name_url} не вернула статус 304"
+    )
+    assert not response.templates, "Шаблон страницы отрисован"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name_url",
+    (
+        pytest.lazy_fixture("home_page_url"),
+        pytest.lazy_fixture("news_detail_url"),
+    ),
+)
+def test_etag_changes_with_comments_and_user(
+    client, author_client, news, name_url, news_detail_url, form_data
+):
+    """
+    Проверяем, что ETag меняется после нового комментария
+    и различается для анонимного и авторизованного пользователя.
+    """
+    etag = client.get(name_url)["ETag"]
+    assert author_client.get(name_url)["ETag"] != etag, (
+        "Анонимный и авторизованный пользователь получили одинаковый ETag"
+    )
+    author_client.post(news_detail_url, data=form_data)
+    response = client.get(name_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "После нового комментария страница не обновилась"
+    )
+    assert response["ETag"] != etag, "ETag не изменился"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "name_url",
+    (
+        pytest.lazy_fixture("news_detail_url"),
+        pytest.lazy_fixture("async_news_detail_url"),
+    ),
+)
+def test_detail_not_modified_only_by_etag(
+    client, author_client, comment, news, name_url
+):
+    """
+    Проверяем, что страница новости не отвечает 304 по одному
+    If-Modified-Since: правка комментария не сдвигает время
+    последнего комментария, но меняет страницу.
+    """
+    response = client.get(name_url)
+    assert not response.has_header("Last-Modified")
+    author_client.post(
+        reverse("news:edit", args=(comment.id,)), data={"text": "Снегопад"}
+    )
+    response = client.get(
+        name_url, HTTP_IF_MODIFIED_SINCE=http_date(
+            comment.created.timestamp() + 60
+        )
+    )
+    assert response.status_code == HTTPStatus.OK, (
+        "Изменённая страница получила ответ 304"
+    )
+
+
+@pytest.fixture
+def warm_banned_words():
+    """Словарь только что проверен и не запрашивается во время теста."""
+    banned_words.expire()
+    banned_words.get_matcher()
+
+
+@pytest.mark.parametrize(
+    "name_url, data",
+    (
+        (pytest.lazy_fixture("news_detail_url"), {"text": "Текст"}),
+        (pytest.lazy_fixture("news_edit_url"), {"text": "Текст"}),
+        (pytest.lazy_fixture("news_delete_url"), {}),
+    ),
+)
+def test_comment_write_query_budget(
+    author_client, warm_banned_words, name_url, data
+):
+    """
+    Проверяем, что создание, редактирование и удаление комментария
+    не загружают новость и комментарий повторно.
+
+    Точки сохранения не считаются: они появляются потому, что тест
+    сам идёт в транзакции.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = author_client.post(name_url, data=data)
+    queries = [
+        query["sql"] for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+    assert len(queries) == WRITE_QUERIES, "\n".join(queries)
+    assert response.status_code == HTTPStatus.FOUND, (
+        f"Запрос к {name_url} не выполнен"
+    )
+
+
+@pytest.mark.django_db
+def test_production_profile_pragmas(tmp_path):
+    """
+    Проверяем, что профиль settings_production включает при подключении
+    WAL, synchronous=NORMAL и ожидание блокировки.
+    """
+    databases = ConnectionHandler({
+        "default": {
+            **settings_production.DATABASES["default"],
+            "NAME": tmp_path / "db.sqlite3",
+        }
+    })
+    database = databases["default"]
+    try:
+        with database.cursor() as cursor:
+            pragmas = {}
+            for pragma in ("journal_mode", "synchronous", "busy_timeout"):
+                cursor.execute(f"PRAGMA {pragma}")
+                pragmas[pragma] = cursor.fetchone()[0]
+    finally:
+        database.close()
+    assert pragmas == {
+        "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000
+    }, "Прагмы профиля settings_production не применены"
+    assert database.transaction_mode == "IMMEDIATE"
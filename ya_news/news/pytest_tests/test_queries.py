@@ -0,0 +1,161 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import Comment, News
+from news.moderation import moderate_batch
+from news.pagination import encode_cursor
+from news.urls import app_name, urlpatterns
+
+# Бюджет запросов для каждого именованного маршрута приложения news:
+# (клиент, аргументы маршрута, наибольшее допустимое число запросов).
+ROUTE_BUDGETS = {
+    "news:home": ("client", None, 2),
+    "news:detail": ("author_client", "news", 5),
+    "news:comments": ("client", "news", 1),
+    "news:edit": ("author_client", "comment", 3),
+    "news:delete": ("author_client", "comment", 3),
+    "news:search": ("client", None, 1),
+    "news:async_home": ("client", None, 2),
+    "news:async_detail": ("author_client", "news", 5),
+}
+# Строки запроса для маршрутов, которым нужны GET-параметры.
+ROUTE_QUERIES = {
+    "news:search": "?q=комментарий",
+}
+
+# Шаги плана запроса SQLite, недопустимые для страниц: полный просмотр
+# таблицы и сортировка во временном B-дереве.
+FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+TEMP_SORT = "USE TEMP B-TREE"
+# Поиск сортирует по релевантности ограниченное число совпадений.
+SORTING_ROUTES = {"news:search"}
+SERVICE_STATEMENTS = ("SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+def is_bad_step(step, tables, allow_sort):
+    if TEMP_SORT in step:
+        return not allow_sort
+    scan = FULL_SCAN.search(step)
+    # Просмотр результата CTE или подзапроса -- не просмотр таблицы.
+    return bool(scan) and scan.group(1) in tables
+
+
+def bad_plan_steps(queries, allow_sort=False):
+    """
+    Выполняет EXPLAIN QUERY PLAN для каждого запроса и возвращает
+    недопустимые шаги планов, сгруппированные по тексту запроса.
+    """
+    tables = set(connection.introspection.table_names())
+    problems = {}
+    for query in queries:
+        sql = query["sql"]
+        if sql.startswith(SERVICE_STATEMENTS):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            steps = [row[-1] for row in cursor.fetchall()]
+        steps = [
+            step for step in steps if is_bad_step(step, tables, allow_sort)
+        ]
+        if steps:
+            problems[sql] = steps
+    return problems
+
+
+@pytest.fixture
+def grow_news_data(news, author, comment, django_user_model):
+    """
+    Доращивает данные: на каждый шаг size новых пользователей,
+    size новостей с комментариями и size комментариев
+    разных авторов к проверяемой новости.
+    """
+    def grow(size):
+        users = django_user_model.objects.bulk_create(
+            django_user_model(username=f"Читатель {size}-{i}")
+            for i in range(size)
+        )
+        more_news = News.objects.bulk_create(
+            News(title=f"Новость {size}-{i}", text="Текст")
+            for i in range(size)
+        )
+        Comment.objects.bulk_create(
+            [
+                Comment(news=news, author=user, text="Комментарий")
+                for user in users
+            ] + [
+                Comment(news=item, author=user, text="Комментарий")
+                for item, user in zip(more_news, users)
+            ] + [
+                Comment(
+                    news=news, author=author, text="На модерации",
+                    status=Comment.Status.PENDING,
+                ),
+            ]
+        )
+        News.objects.sync_comment_count()
+    return grow
+
+
+def test_every_route_has_query_budget():
+    """Проверяем, что бюджет запросов объявлен для каждого маршрута."""
+    route_names = {f"{app_name}:{pattern.name}" for pattern in urlpatterns}
+    assert route_names == set(ROUTE_BUDGETS), (
+        "Бюджет запросов объявлен не для всех маршрутов news"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ROUTE_BUDGETS)
+def test_route_query_budget(
+    request, name, grow_news_data, query_budget, news, comment
+):
+    """
+    Проверяем, что число запросов страницы не растёт вместе
+    с объёмом данных и укладывается в бюджет.
+    """
+    client_name, arg, budget = ROUTE_BUDGETS[name]
+    user_client = request.getfixturevalue(client_name)
+    args = {"news": (news.id,), "comment": (comment.id,)}.get(arg)
+    url = reverse(name, args=args) + ROUTE_QUERIES.get(name, "")
+    query_budget(lambda: user_client.get(url), grow_news_data, budget)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ROUTE_BUDGETS)
+def test_route_query_plans(request, name, grow_news_data, news, comment):
+    """
+    Проверяем, что запросы страницы читают таблицы по индексам
+    и не сортируют строки во временном B-дереве.
+    """
+    grow_news_data(10)
+    client_name, arg, _ = ROUTE_BUDGETS[name]
+    user_client = request.getfixturevalue(client_name)
+    args = {"news": (news.id,), "comment": (comment.id,)}.get(arg)
+    url = reverse(name, args=args) + ROUTE_QUERIES.get(name, "")
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get(url)
+    assert not bad_plan_steps(queries, allow_sort=name in SORTING_ROUTES)
+
+
+@pytest.mark.django_db
+def test_background_query_plans(
+    client, grow_news_data, news, comment, not_author
+):
+    """
+    Проверяем планы запросов подгрузки комментариев по курсору
+    и модерации очереди комментариев разных авторов.
+    """
+    grow_news_data(10)
+    Comment.objects.create(
+        news=news, author=not_author, text="Ещё один",
+        status=Comment.Status.PENDING,
+    )
+    url = reverse("news:comments", args=(news.id,))
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url, {"cursor": encode_cursor(comment)})
+        moderate_batch()
+    assert not bad_plan_steps(queries)
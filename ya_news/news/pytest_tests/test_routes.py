@@ -31,6 +31,7 @@ def test_logout_url_for_anonymous_user(client, user_logout_url):
     ), f"Страница {user_logout_url} недоступна"
 
 
+@pytest.mark.django_db
 @pytest.mark.parametrize(
     "parametrized_client, expected_status",
     (
@@ -0,0 +1,17 @@
+import sqlite3
+from pathlib import Path
+
+
+def copy_database(source, target):
+    """
+    Копирует файл SQLite source в target через backup API.
+
+    Копия согласована, даже если в source в это время пишут,
+    а открытые соединения с target видят новые данные со следующей
+    транзакции. Заменяет настоящую репликацию при локальной работе.
+    """
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(source) as primary, sqlite3.connect(target) as copy:
+        primary.backup(copy)
+    primary.close()
+    copy.close()
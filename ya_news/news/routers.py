@@ -0,0 +1,65 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+
+PRIMARY = 'default'
+REPLICATED_APPS = {'news'}
+
+
+@dataclass
+class RoutingState:
+    """Состояние маршрутизации в рамках одного HTTP-запроса."""
+
+    # Читать с основной базы: запрос пришёл вскоре после записи.
+    pinned: bool = False
+    # Запрос что-то записал в реплицируемые таблицы.
+    wrote: bool = False
+    # Реплика, с которой читает весь запрос.
+    replica: str | None = None
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+class PrimaryReplicaRouter:
+    """
+    Отправляет чтение новостей и комментариев на реплики.
+
+    Реплики из NEWS_READ_REPLICAS используются только внутри запроса,
+    для которого ReadReplicaMiddleware завёл RoutingState и выбрал
+    реплику: все чтения запроса идут с неё, и страница не смешивает
+    данные реплик с разным отставанием. Фоновые обработчики и команды
+    читают с основной базы. Запись всегда идёт в основную базу,
+    и чтение после неё в том же запросе -- тоже.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if (
+            state is None
+            or state.pinned
+            or state.wrote
+            or state.replica is None
+            or model._meta.app_label not in REPLICATED_APPS
+        ):
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None and model._meta.app_label in REPLICATED_APPS:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.NEWS_READ_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Реплики -- копии основной базы, миграции к ним не применяются."""
+        if db in settings.NEWS_READ_REPLICAS:
+            return False
+        return None
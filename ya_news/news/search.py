@@ -0,0 +1,342 @@
+import re
+import sqlite3
+from functools import lru_cache
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import BadRequest
+from django.db import connections, router
+from django.db.models import (
+    Case,
+    CharField,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Replace
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, News
+
+NEWS_FTS = 'news_news_fts'
+COMMENT_FTS = 'news_comment_fts'
+# Совпадение в заголовке весит больше совпадения в тексте,
+# а совпадение в комментарии -- меньше совпадения в самой новости.
+TITLE_WEIGHT = 10.0
+COMMENT_WEIGHT = 0.5
+SNIPPET_WORDS = 16
+# Ранжируются только столько самых новых совпадений каждого вида:
+# в тексте или заголовке новости, только в заголовке и в комментариях.
+# bm25 считается для каждой ранжируемой строки, и без предела частое
+# слово в большом архиве стоило бы сотни миллисекунд на запрос. Старая
+# новость с совпадением в заголовке не теряется за новыми упоминаниями
+# в тексте: совпадения в заголовках отбираются отдельно.
+SEARCH_CANDIDATES = 5000
+MARK_START, MARK_END = '\x02', '\x03'
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def fold_yo(text):
+    """«Ё» в индексе и в запросах хранится как «е»."""
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def fold_yo_sql(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    """Собрана ли библиотека SQLite с модулем FTS5."""
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE probe USING fts5(text)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def search_supported(connection):
+    """Есть ли в базе полнотекстовый индекс: SQLite с модулем FTS5."""
+    return connection.vendor == 'sqlite' and fts5_available()
+
+
+def search_supported_check(databases=None, **kwargs):
+    """Без FTS5 поиск по новостям работает медленнее и без ранжирования."""
+    if not databases or search_supported(connections['default']):
+        return []
+    return [checks.Warning(
+        'Полнотекстовый поиск по новостям недоступен: нужна база SQLite '
+        'с модулем FTS5. Используется простой поиск по подстроке.',
+        id='news.W001',
+    )]
+
+
+def _schema():
+    """
+    Таблицы FTS5 и триггеры, которые их обновляют.
+
+    Индекс обновляется в той же инструкции, что меняет новость или
+    комментарий, поэтому его не обходят ни bulk_create, ни update()
+    модерации, ни каскадное удаление. В индекс попадают только
+    одобренные комментарии.
+    """
+    news, comment = News._meta.db_table, Comment._meta.db_table
+    approved = Comment.Status.APPROVED
+    index_news = (
+        f'INSERT INTO {NEWS_FTS} (rowid, title, text) VALUES '
+        f"(new.id, {fold_yo_sql('new.title')}, {fold_yo_sql('new.text')});"
+    )
+    index_comment = (
+        f'INSERT INTO {COMMENT_FTS} (rowid, text, news_id) '
+        f"SELECT new.id, {fold_yo_sql('new.text')}, new.news_id "
+        f"WHERE new.status = '{approved}';"
+    )
+    unindex_news = f'DELETE FROM {NEWS_FTS} WHERE rowid = old.id;'
+    unindex_comment = f'DELETE FROM {COMMENT_FTS} WHERE rowid = old.id;'
+    return (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {NEWS_FTS} '
+        'USING fts5(title, text)',
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENT_FTS} '
+        'USING fts5(text, news_id UNINDEXED)',
+        f'CREATE TRIGGER IF NOT EXISTS {NEWS_FTS}_insert '
+        f'AFTER INSERT ON {news} BEGIN {index_news} END',
+        f'CREATE TRIGGER IF NOT EXISTS {NEWS_FTS}_update '
+        f'AFTER UPDATE OF title, text ON {news} '
+        f'BEGIN {unindex_news} {index_news} END',
+        f'CREATE TRIGGER IF NOT EXISTS {NEWS_FTS}_delete '
+        f'AFTER DELETE ON {news} BEGIN {unindex_news} END',
+        f'CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS}_insert '
+        f'AFTER INSERT ON {comment} BEGIN {index_comment} END',
+        f'CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS}_update '
+        f'AFTER UPDATE OF text, status, news_id ON {comment} '
+        f'BEGIN {unindex_comment} {index_comment} END',
+        f'CREATE TRIGGER IF NOT EXISTS {COMMENT_FTS}_delete '
+        f'AFTER DELETE ON {comment} BEGIN {unindex_comment} END',
+    )
+
+
+def rebuild_search_index(using='default'):
+    """Заполняет индекс заново по текущим новостям и комментариям."""
+    connection = connections[using]
+    news, comment = News._meta.db_table, Comment._meta.db_table
+    with connection.cursor() as cursor:
+        for statement in _schema():
+            cursor.execute(statement)
+        cursor.execute(f'DELETE FROM {NEWS_FTS}')
+        cursor.execute(f'DELETE FROM {COMMENT_FTS}')
+        cursor.execute(
+            f'INSERT INTO {NEWS_FTS} (rowid, title, text) '
+            f"SELECT id, {fold_yo_sql('title')}, {fold_yo_sql('text')} "
+            f'FROM {news}'
+        )
+        cursor.execute(
+            f'INSERT INTO {COMMENT_FTS} (rowid, text, news_id) '
+            f"SELECT id, {fold_yo_sql('text')}, news_id FROM {comment} "
+            'WHERE status = %s',
+            [Comment.Status.APPROVED],
+        )
+
+
+def create_search_index(using='default'):
+    """
+    Создаёт индекс и его триггеры, если их нет.
+
+    Обычно их создаёт миграция 0008_search_index; функция нужна для
+    баз, построенных по моделям без миграций, как тестовая. Если
+    индекса ещё не было, в него сразу попадают существующие новости
+    и комментарии.
+    """
+    connection = connections[using]
+    if not search_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        if NEWS_FTS not in connection.introspection.table_names(cursor):
+            rebuild_search_index(using)
+            return
+        for statement in _schema():
+            cursor.execute(statement)
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет в нём найденные слова."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+SEARCH_SQL = f'''
+WITH news_matches AS (
+    SELECT rowid AS news_id, 'news' AS source, rowid AS row_id,
+        bm25({NEWS_FTS}, {TITLE_WEIGHT}, 1.0) AS score
+    FROM {NEWS_FTS} WHERE {NEWS_FTS} MATCH %s
+    ORDER BY rowid DESC LIMIT {SEARCH_CANDIDATES}
+), title_matches AS (
+    SELECT rowid, 'news', rowid, bm25({NEWS_FTS}, {TITLE_WEIGHT}, 1.0)
+    FROM {NEWS_FTS} WHERE {NEWS_FTS} MATCH %s
+    ORDER BY rowid DESC LIMIT {SEARCH_CANDIDATES}
+), comment_matches AS (
+    SELECT news_id, 'comment', rowid,
+        bm25({COMMENT_FTS}) * {COMMENT_WEIGHT}
+    FROM {COMMENT_FTS} WHERE {COMMENT_FTS} MATCH %s
+    ORDER BY rowid DESC LIMIT {SEARCH_CANDIDATES}
+), matches AS (
+    SELECT * FROM news_matches UNION ALL SELECT * FROM title_matches
+    UNION ALL SELECT * FROM comment_matches
+), page AS (
+    SELECT news_id, source, row_id, MIN(score) AS score
+    FROM matches GROUP BY news_id
+    ORDER BY score, news_id DESC LIMIT %s OFFSET %s
+)
+SELECT news.id, news.title, news.date, news.comment_count,
+    page.source AS match_source,
+    (SELECT COUNT(*) FROM news_matches) = {SEARCH_CANDIDATES}
+        OR (SELECT COUNT(*) FROM title_matches) = {SEARCH_CANDIDATES}
+        OR (SELECT COUNT(*) FROM comment_matches) = {SEARCH_CANDIDATES}
+        AS truncated,
+    CASE page.source
+        WHEN 'news' THEN (
+            SELECT snippet({NEWS_FTS}, -1, %s, %s, '…', {SNIPPET_WORDS})
+            FROM {NEWS_FTS}
+            WHERE {NEWS_FTS} MATCH %s AND rowid = page.row_id
+        )
+        ELSE (
+            SELECT snippet({COMMENT_FTS}, 0, %s, %s, '…', {SNIPPET_WORDS})
+            FROM {COMMENT_FTS}
+            WHERE {COMMENT_FTS} MATCH %s AND rowid = page.row_id
+        )
+    END AS snippet
+FROM page JOIN {News._meta.db_table} AS news ON news.id = page.news_id
+ORDER BY page.score, page.news_id DESC
+'''
+
+
+def _fold_yo_expression(field):
+    folded = Replace(field, Value('ё'), Value('е'), output_field=TextField())
+    return Replace(folded, Value('Ё'), Value('Е'), output_field=TextField())
+
+
+def simple_search(words):
+    """
+    Новости, найденные без индекса: поиск подстрок через icontains.
+
+    Нужен на базах без FTS5. Как и полнотекстовый поиск, находит
+    новость, если все слова есть в её заголовке и тексте или в одном
+    одобренном комментарии к ней, но не ранжирует результаты: новые
+    новости идут первыми. В comment_text -- текст найденного
+    комментария.
+    """
+    in_news = Q()
+    comments = Comment.objects.filter(
+        news=OuterRef('pk'), status=Comment.Status.APPROVED
+    ).annotate(folded_text=_fold_yo_expression('text'))
+    for word in words:
+        in_news &= (
+            Q(folded_title__icontains=word) | Q(folded_text__icontains=word)
+        )
+        comments = comments.filter(folded_text__icontains=word)
+    return News.objects.annotate(
+        folded_title=_fold_yo_expression('title'),
+        folded_text=_fold_yo_expression('text'),
+        comment_text=Subquery(comments.order_by('-pk').values('text')[:1]),
+        match_source=Case(
+            When(in_news, then=Value('news')), default=Value('comment'),
+            output_field=CharField(),
+        ),
+    ).filter(
+        in_news | Q(comment_text__isnull=False)
+    ).only('title', 'text', 'date', 'comment_count').order_by('-date', '-pk')
+
+
+class SearchPage:
+    """
+    Страница результатов поиска по новостям и их комментариям.
+
+    Новость находится, если все слова запроса есть в её заголовке
+    и тексте или в одном одобренном комментарии к ней. Результаты
+    упорядочены по релевантности (bm25) среди SEARCH_CANDIDATES самых
+    новых совпадений каждого вида (truncated -- если совпадений больше),
+    у каждого есть фрагмент текста с выделенными словами.
+    Вся страница вместе с фрагментами выбирается одним запросом при
+    первом обращении к results. На базе без FTS5 поиск выполняет
+    simple_search(), а фрагментом служит начало текста.
+    """
+
+    def __init__(self, query, page=None, per_page=None):
+        self.query = query
+        self.number = self.parse_page(page)
+        self.per_page = per_page or settings.NEWS_SEARCH_RESULTS_ON_PAGE
+
+    @staticmethod
+    def parse_page(page):
+        if page is None:
+            return 1
+        if not page.isdigit() or int(page) < 1:
+            raise BadRequest('Некорректный номер страницы поиска')
+        return int(page)
+
+    @cached_property
+    def words(self):
+        return WORD_PATTERN.findall(fold_yo(self.query))
+
+    @cached_property
+    def expression(self):
+        """Выражение MATCH: все слова запроса, каждое в кавычках."""
+        return ' '.join(f'"{word}"' for word in self.words)
+
+    def _simple_rows(self, offset):
+        news_list = list(
+            simple_search(self.words)[offset:offset + self.per_page + 1]
+        )
+        for news in news_list:
+            text = news.text if news.match_source == 'news' else (
+                news.comment_text
+            )
+            news.snippet = Truncator(text).words(SNIPPET_WORDS)
+        return news_list
+
+    @cached_property
+    def _rows(self):
+        if not self.words:
+            return []
+        offset = (self.number - 1) * self.per_page
+        if not search_supported(connections[router.db_for_read(News)]):
+            return self._simple_rows(offset)
+        match = self.expression
+        return list(News.objects.raw(SEARCH_SQL, [
+            match, f'title : ({match})', match,
+            self.per_page + 1, offset,
+            MARK_START, MARK_END, match,
+            MARK_START, MARK_END, match,
+        ]))
+
+    @cached_property
+    def results(self):
+        news_list = self._rows[:self.per_page]
+        for news in news_list:
+            news.highlighted = highlight(news.snippet)
+        return news_list
+
+    @property
+    def truncated(self):
+        """Показаны не все совпадения, а только самые релевантные."""
+        return bool(self._rows) and bool(
+            getattr(self._rows[0], 'truncated', False)
+        )
+
+    @property
+    def has_next(self):
+        return len(self._rows) > self.per_page
+
+    @property
+    def has_previous(self):
+        return self.number > 1
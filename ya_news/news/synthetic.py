@@ -0,0 +1,132 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .models import Comment, News
+
+# Пароль всех созданных пользователей, чтобы под ними можно было войти.
+PASSWORD = 'synthetic'
+# Показатель закона Ципфа: у первой по популярности новости
+# комментариев примерно вдвое больше, чем у второй, и так далее.
+COMMENTS_SKEW = 1.0
+PENDING_SHARE = 0.05
+NEWS_PER_DAY = 20
+
+SUBJECTS = (
+    'Мэрия', 'Сборная', 'Учёные', 'Театр', 'Метро', 'Фермеры', 'Школьники',
+    'Музей', 'Банк', 'Зоопарк', 'Библиотека', 'Порт', 'Стартап', 'Оркестр',
+)
+ACTIONS = (
+    'открыли', 'представили', 'отменили', 'перенесли', 'обсудили',
+    'запустили', 'объявили', 'поддержали', 'проверили', 'показали',
+)
+OBJECTS = (
+    'новый маршрут', 'летний фестиваль', 'план ремонта', 'выставку',
+    'конкурс проектов', 'бесплатные курсы', 'ночной рейс', 'сезон',
+    'городской парк', 'новую программу', 'итоги года', 'реконструкцию',
+)
+WORDS = (
+    'город', 'жители', 'сегодня', 'вечером', 'новость', 'решение', 'район',
+    'улица', 'вопрос', 'мнение', 'интересно', 'согласен', 'спасибо',
+    'странно', 'давно', 'пора', 'хорошо', 'плохо', 'дети', 'работа',
+    'погода', 'праздник', 'транспорт', 'цены', 'ремонт', 'парк', 'лето',
+)
+
+
+def sentence(rng, length):
+    words = rng.choices(WORDS, k=length)
+    return ' '.join(words).capitalize() + '.'
+
+
+def news_title(rng):
+    return (
+        f'{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} '
+        f'{rng.choice(OBJECTS)}'
+    )
+
+
+def create_users(count, batch_size):
+    """Пользователи user1..userN с общим заранее посчитанным паролем."""
+    password = make_password(PASSWORD)
+    return get_user_model().objects.bulk_create(
+        (
+            get_user_model()(username=f'user{number}', password=password)
+            for number in range(1, count + 1)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def create_news(rng, count, batch_size):
+    """Новости за последние дни, по NEWS_PER_DAY в день."""
+    today = timezone.localdate()
+    return News.objects.bulk_create(
+        (
+            News(
+                title=news_title(rng),
+                text=' '.join(sentence(rng, 12) for _ in range(4)),
+                date=today - timedelta(days=number // NEWS_PER_DAY),
+            )
+            for number in range(count)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def create_comments(rng, news_list, users, count, batch_size):
+    """
+    Комментарии с распределением по новостям по закону Ципфа.
+
+    Популярность новостей перемешана, чтобы самые обсуждаемые не
+    совпадали с самыми свежими. Время комментариев растёт от часа
+    назад до текущего момента.
+    """
+    popular = list(news_list)
+    rng.shuffle(popular)
+    cumulative = list(accumulate(
+        1 / rank ** COMMENTS_SKEW for rank in range(1, len(popular) + 1)
+    ))
+    start = timezone.now() - timedelta(hours=1)
+    step = timedelta(hours=1) / max(count, 1)
+    for first in range(0, count, batch_size):
+        numbers = range(first, min(first + batch_size, count))
+        targets = rng.choices(popular, cum_weights=cumulative, k=len(numbers))
+        comments = [
+            Comment(
+                news=news,
+                author=rng.choice(users),
+                text=sentence(rng, rng.randint(3, 20)),
+                created=start + step * number,
+                submitted=start + step * number,
+                status=(
+                    Comment.Status.PENDING
+                    if rng.random() < PENDING_SHARE
+                    else Comment.Status.APPROVED
+                ),
+            )
+            for number, news in zip(numbers, targets)
+        ]
+        Comment.objects.bulk_create(comments)
+    News.objects.sync_comment_count()
+
+
+def generate(users, news, comments, seed=0, batch_size=2000):
+    """
+    Синтетический набор данных для нагрузочных замеров.
+
+    Одно и то же seed на пустой базе даёт одни и те же строки (кроме
+    времени комментариев, которое отсчитывается от текущего момента).
+    Возвращает числа созданных пользователей, новостей и комментариев.
+    """
+    rng = random.Random(seed)
+    created_users = create_users(users, batch_size)
+    created_news = create_news(rng, news, batch_size)
+    if created_news and created_users:
+        create_comments(rng, created_news, created_users, comments, batch_size)
+    else:
+        comments = 0
+    return len(created_users), len(created_news), comments
@@ -6,7 +6,19 @@ app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('async/', views.AsyncNewsList.as_view(), name='async_home'),
+    path(
+        'async/news/<int:pk>/',
+        views.AsyncNewsDetail.as_view(),
+        name='async_detail'
+    ),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
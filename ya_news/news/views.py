@@ -1,38 +1,74 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
-
+from django.views.decorators.http import condition
+
+from .cache import (
+    AnonymousPageCacheMixin,
+    acached_page,
+    aget_detail_state,
+    aget_home_state,
+    detail_cache_key,
+    detail_etag,
+    home_cache_key,
+    home_etag,
+)
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import CommentPage
+from .search import SearchPage
 
 
-class NewsList(generic.ListView):
+@method_decorator(condition(etag_func=home_etag), name='get')
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
 
+    def get_page_cache_key(self):
+        return home_cache_key(self.request)
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
 
+class NewsCommentsMixin:
+    """Добавляет на страницу новости первую порцию комментариев."""
 
-class NewsDetail(generic.DetailView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = CommentPage(
+            self.object.comment_set.visible_to(
+                self.request.user
+            ).select_related('author')
+        )
+        context['cache_timeout'] = settings.NEWS_CACHE_TIMEOUT
+        return context
+
+
+@method_decorator(condition(etag_func=detail_etag), name='get')
+class NewsDetail(
+        AnonymousPageCacheMixin,
+        NewsCommentsMixin,
+        generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
+    def get_page_cache_key(self):
+        return detail_cache_key(self.request, self.kwargs['pk'])
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
+        obj = get_object_or_404(self.model, pk=self.kwargs['pk'])
         return obj
 
     def get_context_data(self, **kwargs):
@@ -44,6 +80,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        NewsCommentsMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,12 +96,14 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        comment.status = Comment.Status.PENDING
         comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,19 +117,119 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class AsyncNewsList(generic.View):
+    """
+    Асинхронный вариант NewsList для работы под ASGI-сервером.
+
+    Запросы к базе и кэшу выполняются через асинхронный API ORM,
+    ETag, ответ 304 и кэш страницы для анонимных -- как в NewsList.
+    """
+
+    async def get(self, request):
+        request.user = await request.auser()
+        # Синхронные функции ключа и ETag возьмут состояние из запроса.
+        await aget_home_state(request)
+
+        async def render_page():
+            news_list = [
+                news async for news in
+                News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+            ]
+            return render(request, NewsList.template_name, {
+                'object_list': news_list, 'news_list': news_list,
+            })
+
+        return await acached_page(
+            request, home_cache_key(request), home_etag(request), render_page,
+        )
+
+
+class AsyncNewsDetail(generic.View):
+    """Асинхронный вариант NewsDetailView."""
+
+    async def get(self, request, pk):
+        request.user = await request.auser()
+        if await aget_detail_state(request, pk) is None:
+            raise Http404('Новость не найдена')
+
+        async def render_page():
+            try:
+                news = await News.objects.aget(pk=pk)
+            except News.DoesNotExist:
+                # Новость удалили после проверки версии.
+                raise Http404('Новость не найдена')
+            comments_page = CommentPage(
+                news.comment_set.visible_to(
+                    request.user
+                ).select_related('author')
+            )
+            # Шаблон не может обращаться к базе из асинхронного кода.
+            await comments_page.afetch()
+            context = {
+                'object': news,
+                'news': news,
+                'comments_page': comments_page,
+                'cache_timeout': settings.NEWS_CACHE_TIMEOUT,
+            }
+            if request.user.is_authenticated:
+                context['form'] = CommentForm()
+            return render(request, NewsDetail.template_name, context)
+
+        return await acached_page(
+            request,
+            detail_cache_key(request, pk),
+            detail_etag(request, pk),
+            render_page,
+        )
+
+
+class NewsComments(generic.TemplateView):
+    """Следующая порция комментариев к новости."""
+    template_name = 'news/includes/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = CommentPage(
+            Comment.objects.filter(
+                news_id=self.kwargs['pk']
+            ).visible_to(self.request.user).select_related('author'),
+            cursor=self.request.GET.get('cursor'),
+        )
+        context['news_pk'] = self.kwargs['pk']
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям к ним."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        context['query'] = query
+        context['search_page'] = SearchPage(
+            query, page=self.request.GET.get('page')
+        )
+        return context
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        queryset = self.model.objects.filter(author=self.request.user)
+        if self.request.method == 'GET':
+            # Заголовок новости нужен только странице с формой,
+            # при записи достаточно news_id.
+            queryset = queryset.select_related('news')
+        return queryset
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,6 +237,11 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Изменённый комментарий заново проходит модерацию."""
+        form.instance.status = Comment.Status.PENDING
+        return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
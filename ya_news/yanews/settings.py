@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'news.middleware.ReadReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -58,6 +59,13 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanews',
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +88,17 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+NEWS_SEARCH_RESULTS_ON_PAGE = 10
+
+NEWS_CACHE_TIMEOUT = 60 * 10
+
+BANNED_WORDS_CHECK_INTERVAL = 5
+
+DATABASE_ROUTERS = ['news.routers.PrimaryReplicaRouter']
+# Псевдонимы баз из DATABASES, с которых читаются новости и комментарии.
+NEWS_READ_REPLICAS = ()
+# Сколько секунд после записи сессия читает с основной базы.
+NEWS_REPLICATION_LAG = 5
@@ -0,0 +1,40 @@
+"""
+Профиль базы данных для работы под нагрузкой.
+
+Включается переменной окружения
+DJANGO_SETTINGS_MODULE=yanews.settings_production, остальные
+настройки берутся из yanews.settings.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES
+
+# Прагмы выполняются при каждом подключении:
+# WAL -- читатели не ждут писателя, а фиксация транзакции не требует
+# fsync основного файла; synchronous=NORMAL в режиме WAL не теряет
+# целостность, только последние транзакции при отключении питания;
+# mmap и кэш страниц по 256 и 64 МБ; временные таблицы в памяти.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA cache_size = -65536',
+    'PRAGMA temp_store = MEMORY',
+)
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRAGMAS),
+            # Ждать освобождения блокировки до 5 секунд (busy timeout).
+            'timeout': 5,
+            # Транзакция сразу берёт блокировку записи: иначе две
+            # транзакции, начавшие с чтения, не могут обе перейти
+            # к записи, и одна сразу получает «database is locked».
+            # Параметр появился в Django 5.1.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
@@ -0,0 +1,18 @@
+"""
+Основная база и реплика для чтения на двух файлах SQLite.
+
+Включается через DJANGO_SETTINGS_MODULE=yanews.settings_replicas.
+Реплику обновляет команда sync_replicas, запущенная с --loop.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+    },
+}
+
+NEWS_READ_REPLICAS = ('replica',)
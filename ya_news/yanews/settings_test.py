@@ -0,0 +1,47 @@
+"""
+Настройки для запуска тестов.
+
+Подключаются через DJANGO_SETTINGS_MODULE=yanews.settings_test
+(так делают run_tests.sh и parallel_tests.py), всё остальное
+совпадает с yanews.settings.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES, MIDDLEWARE, TEMPLATES
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'NAME': ':memory:',
+        # Таблицы создаются прямо по моделям, без прогона миграций.
+        # Индекс поиска и его триггеры вместо миграции создаёт conftest.
+        'TEST': {'MIGRATE': False},
+    }
+}
+
+# PBKDF2 тратит на каждый пароль десятки миллисекунд, а пароли
+# тестовых пользователей защищать не нужно.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Эти middleware только добавляют заголовки безопасности к ответу.
+MIDDLEWARE = [
+    name for name in MIDDLEWARE
+    if name not in (
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    )
+]
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
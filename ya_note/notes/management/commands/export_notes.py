@@ -0,0 +1,12 @@
+from notes.models import Note
+from notes.transfer import ExportCommand
+
+
+class Command(ExportCommand):
+    help = 'Выгружает заметки в JSONL или CSV в формате import_notes.'
+    fields = ('id', 'author', 'title', 'text', 'slug')
+
+    def get_rows(self):
+        return Note.objects.order_by('pk').values_list(
+            'id', 'author__username', 'title', 'text', 'slug'
+        )
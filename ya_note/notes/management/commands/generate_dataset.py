@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from notes.synthetic import PASSWORD, generate
+from notes.transfer import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для нагрузочных замеров: '
+        'пользователи user1..userN и по --notes-per-user заметок у '
+        'каждого, с повторяющимися русскими заголовками. Одно и то же '
+        '--seed даёт те же данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--notes-per-user', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк сохранять за один запрос.',
+        )
+
+    def handle(self, *args, users, notes_per_user, seed, batch_size,
+               **options):
+        try:
+            with transaction.atomic():
+                totals = generate(users, notes_per_user, seed, batch_size)
+        except IntegrityError as e:
+            raise CommandError(
+                f'Не удалось создать данные, база должна быть пустой: {e}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Создано пользователей: {}, заметок: {}'.format(*totals)
+        ))
+        self.stdout.write(f'Пароль пользователей: {PASSWORD}')
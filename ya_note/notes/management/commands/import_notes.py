@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+
+from notes.models import Note
+from notes.search import get_index
+from notes.slugs import SlugBatch
+from notes.transfer import ImportCommand
+
+
+class Command(ImportCommand):
+    help = (
+        'Загружает заметки из файла JSONL или CSV пачками. '
+        'Поля записи: author (имя пользователя), title, text, '
+        'необязательные id и slug. Недостающие slug подбираются '
+        'сразу для всей пачки, заметки попадают в поисковый индекс.'
+    )
+    model = Note
+    fields = ('id', 'title', 'text', 'slug', 'author_id')
+
+    def handle(self, *args, **options):
+        self.slugs = SlugBatch(
+            Note.objects.all(),
+            Note._meta.get_field('slug').max_length,
+            fallback=Note._meta.model_name,
+        )
+        self.index = get_index()
+        return super().handle(*args, **options)
+
+    def import_batch(self, records, first_line):
+        authors = dict(get_user_model().objects.filter(
+            username__in={record.get('author') for record in records}
+        ).values_list('username', 'pk'))
+        rows = []
+        for line, record in enumerate(records, first_line):
+            row = dict(record)
+            username = row.pop('author', None)
+            if username not in authors:
+                raise ValueError(
+                    f'запись {line}: нет пользователя {username!r}'
+                )
+            row['author_id'] = authors[username]
+            rows.append(row)
+        notes = self.build(rows, first_line, exclude=('author',))
+        self.slugs.reserve(note.slug for note in notes if note.slug)
+        without_slug = [note for note in notes if not note.slug]
+        for note, slug in zip(without_slug, self.slugs.allocate(
+            note.title for note in without_slug
+        )):
+            note.slug = slug
+        # Сигналы post_save при bulk_create не срабатывают.
+        self.index.add(Note.objects.bulk_create(notes))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes.search import REBUILD_BATCH_SIZE, get_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс заметок. Нужен при первом '
+        'запуске поиска и после переключения NOTES_SEARCH_FTS; '
+        'дальше индекс обновляется при каждом изменении заметки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+            help='Сколько заметок индексировать за один запрос.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            total = rebuild_index(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано заметок: {total} '
+            f'({type(get_index()).__name__})'
+        ))
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+from notes.search import fts5_available
+
+# Таблицу заполняет и обновляет код: после миграции базы с заметками
+# нужна команда rebuild_search_index.
+CREATE = (
+    'CREATE VIRTUAL TABLE notes_note_fts USING fts5(title, text, author)'
+)
+DROP = 'DROP TABLE IF EXISTS notes_note_fts'
+
+
+class RunSearchSQL(migrations.RunSQL):
+    """
+    RunSQL только для SQLite с модулем FTS5.
+
+    На других базах поиск идёт по запасному индексу SearchTerm.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'sqlite' and fts5_available():
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'sqlite' and fts5_available():
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_searchterm'),
+    ]
+
+    operations = [
+        RunSearchSQL(CREATE, DROP),
+    ]
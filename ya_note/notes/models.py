@@ -1,7 +1,7 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import SLUG_RETRIES, allocate_slug
 
 
 class Note(models.Model):
@@ -28,11 +28,52 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            # Список заметок автора читается страницами по возрастанию id.
+            models.Index(
+                fields=('author', 'id'), name='notes_note_author_id_idx'
+            ),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            # Заметка и её строка в поисковом индексе пишутся вместе.
+            with transaction.atomic():
+                return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        for attempt in range(1, SLUG_RETRIES + 1):
+            self.slug = allocate_slug(
+                Note.objects.exclude(pk=self.pk),
+                self.title,
+                max_slug_length,
+                fallback=self._meta.model_name,
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Свободный slug успел занять параллельный запрос.
+                self.slug = ''
+                if attempt == SLUG_RETRIES:
+                    raise
+
+
+class SearchTerm(models.Model):
+    """Слово заметки в запасном поисковом индексе без FTS5."""
+
+    term = models.CharField(max_length=100)
+    note = models.ForeignKey(Note, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'note'), name='notes_searchterm_unique'
+            ),
+        )
+
+    def __str__(self):
+        return self.term
@@ -0,0 +1,208 @@
+import re
+import sqlite3
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, router
+
+from .models import Note, SearchTerm
+
+FTS_TABLE = 'notes_note_fts'
+REBUILD_BATCH_SIZE = 2000
+WORD_PATTERN = re.compile(r'\w+')
+MAX_WORD_LENGTH = SearchTerm._meta.get_field('term').max_length
+
+
+def normalize(text):
+    """Текст для индекса: без регистра, «ё» не отличается от «е»."""
+    return text.casefold().replace('ё', 'е')
+
+
+def tokenize(text):
+    """
+    Слова текста в том виде, в каком они хранятся в индексе.
+
+    Слова длиннее MAX_WORD_LENGTH (ссылки, хэши) не индексируются
+    и не ищутся.
+    """
+    return [
+        word for word in WORD_PATTERN.findall(normalize(text))
+        if len(word) <= MAX_WORD_LENGTH
+    ]
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    """Собрана ли библиотека SQLite с модулем FTS5."""
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE probe USING fts5(text)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+class FtsIndex:
+    """
+    Индекс на виртуальной таблице SQLite FTS5.
+
+    Строка таблицы -- копия нормализованных заголовка и текста заметки
+    с rowid, равным id заметки. Автор хранится токеном в отдельной
+    колонке и входит в выражение MATCH, поэтому FTS5 сразу пересекает
+    списки заметок автора и искомых слов, не просматривая чужие.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def author_token(author_id):
+        return f'u{author_id}'
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                'USING fts5(title, text, author)'
+            )
+
+    def rows(self, notes):
+        return [
+            (
+                note.pk, normalize(note.title), normalize(note.text),
+                self.author_token(note.author_id),
+            )
+            for note in notes
+        ]
+
+    def add(self, notes):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, text, author) '
+                'VALUES (%s, %s, %s, %s)',
+                self.rows(notes),
+            )
+
+    def update(self, note):
+        self.remove(note.pk)
+        self.add([note])
+
+    def remove(self, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, author_id, words, limit):
+        expression = 'author : "{}" AND {{title text}} : ({})'.format(
+            self.author_token(author_id),
+            ' AND '.join(f'"{word}"' for word in words),
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s',
+                [expression, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = Note.objects.using(self.connection.alias).filter(
+            author_id=author_id
+        ).only('id', 'title', 'slug').in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+
+class TermIndex:
+    """
+    Запасной индекс без FTS5: таблица пар (слово, заметка).
+
+    Заметки, содержащие все слова запроса, ищутся по индексу
+    (term, note); новые заметки идут первыми.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        """Таблица SearchTerm создаётся миграциями."""
+
+    def add(self, notes):
+        SearchTerm.objects.using(self.connection.alias).bulk_create(
+            SearchTerm(term=term, note_id=note.pk)
+            for note in notes
+            for term in set(tokenize(f'{note.title} {note.text}'))
+        )
+
+    def update(self, note):
+        self.remove(note.pk)
+        self.add([note])
+
+    def remove(self, pk):
+        SearchTerm.objects.using(self.connection.alias).filter(
+            note_id=pk
+        ).delete()
+
+    def clear(self):
+        SearchTerm.objects.using(self.connection.alias).all().delete()
+
+    def search(self, author_id, words, limit):
+        alias = self.connection.alias
+        notes = Note.objects.using(alias).filter(author_id=author_id)
+        for word in words:
+            notes = notes.filter(pk__in=SearchTerm.objects.using(alias).filter(
+                term=word
+            ).values('note'))
+        notes = notes.only('id', 'title', 'slug').order_by('-id')
+        return list(notes[:limit])
+
+
+def get_index(using=None):
+    """Индекс заметок для базы using: FTS5, если он доступен."""
+    connection = connections[using or router.db_for_write(Note)]
+    if (
+        settings.NOTES_SEARCH_FTS
+        and connection.vendor == 'sqlite'
+        and fts5_available()
+    ):
+        return FtsIndex(connection)
+    return TermIndex(connection)
+
+
+def create_search_index(using='default'):
+    """
+    Создаёт таблицу FTS5, если её нет.
+
+    Обычно её создаёт миграция 0004_note_search_index; функция нужна
+    для баз, построенных по моделям без миграций, как тестовая.
+    """
+    get_index(using).create()
+
+
+def search_notes(author, query, limit):
+    """Заметки автора, содержащие все слова запроса, не больше limit."""
+    words = tokenize(query)
+    if not words:
+        return []
+    return get_index().search(author.pk, words, limit)
+
+
+def rebuild_index(batch_size=REBUILD_BATCH_SIZE, using=None):
+    """Переиндексирует все заметки пачками, возвращает их число."""
+    index = get_index(using)
+    index.create()
+    index.clear()
+    notes = Note.objects.using(index.connection.alias).only(
+        'id', 'title', 'text', 'author'
+    ).order_by('pk')
+    total = 0
+    batch = []
+    for note in notes.iterator(chunk_size=batch_size):
+        batch.append(note)
+        if len(batch) == batch_size:
+            index.add(batch)
+            total += len(batch)
+            batch = []
+    index.add(batch)
+    return total + len(batch)
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+from .search import get_index
+
+INDEXED_FIELDS = {'title', 'text', 'author'}
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, using, update_fields, **kwargs):
+    """
+    Обновляет заметку в поисковом индексе после сохранения.
+
+    Note.save пишет заметку в транзакции, и ошибка индекса отменяет
+    запись. Удаление и вставка строки индекса идут вместе.
+    """
+    if update_fields is not None and not INDEXED_FIELDS & update_fields:
+        return
+    with transaction.atomic(using=using):
+        get_index(using).update(instance)
+
+
+@receiver(post_delete, sender=Note)
+def unindex_note(sender, instance, using, **kwargs):
+    """Убирает удалённую заметку из поискового индекса."""
+    get_index(using).remove(instance.pk)
@@ -0,0 +1,186 @@
+import re
+from functools import cache, lru_cache
+
+from django.conf import settings
+from django.db.models import Exists, Q
+from django.db.models.functions import Length
+from pytils.translit import slugify
+
+# Сколько раз пробовать сохранить заметку с новым slug,
+# если параллельный запрос успел занять выбранный.
+SLUG_RETRIES = 5
+
+
+@cache
+def _transliteration_cache():
+    """
+    Кэш транслитерации процесса, создаётся при первом обращении.
+
+    Один и тот же заголовок транслитерируется много раз: при сохранении
+    заметки, при подборе свободного slug, при импорте. Кэш ограничен
+    NOTES_SLUGIFY_CACHE_SIZE последними заголовками; настройка
+    читается при создании кэша, а не при импорте модуля.
+    """
+    return lru_cache(maxsize=settings.NOTES_SLUGIFY_CACHE_SIZE)(slugify)
+
+
+def transliterate(title):
+    """Транслитерация заголовка в slug через кэш процесса."""
+    return _transliteration_cache()(title)
+
+
+def clear_transliteration_cache():
+    """Сбрасывает кэш: новый создаётся с текущей настройкой размера."""
+    _transliteration_cache.cache_clear()
+
+
+def transliteration_cache_stats():
+    """
+    Счётчики кэша транслитерации текущего процесса для мониторинга.
+
+    hit_rate -- доля обращений, обслуженных из кэша.
+    """
+    info = _transliteration_cache().cache_info()
+    calls = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': info.hits / calls if calls else 0.0,
+    }
+
+
+def slug_base(slug, max_length):
+    """Обрезанный slug без дефиса на конце: иначе вышло бы «foo--2»."""
+    return slug[:max_length].rstrip('-')
+
+
+def next_free_slug(base, taken):
+    """Первый свободный вариант: base, затем base-N после наибольшего N."""
+    if base not in taken:
+        return base
+    suffix = re.compile(re.escape(base) + r'-(\d+)')
+    numbers = [
+        int(match.group(1))
+        for match in map(suffix.fullmatch, taken)
+        if match
+    ]
+    return f'{base}-{max(numbers, default=1) + 1}'
+
+
+def allocate_slug(queryset, title, max_length, fallback):
+    """
+    Подбирает свободный slug для заголовка.
+
+    Одним запросом читается одна строка: вариант base-N с наибольшим
+    номером (длиннее -- значит больше, при равной длине сравниваются
+    строки) и признак, занят ли сам base. Варианты ищутся в диапазоне
+    base <= slug < base + '.': символ '.' идёт сразу после '-',
+    поэтому диапазон читается по уникальному индексу slug и не задевает
+    посторонние значения.
+    Диапазон рассчитан на побайтовое сравнение строк, как в SQLite
+    и в PostgreSQL с COLLATE "C": при лингвистической сортировке
+    часть вариантов выпала бы из него, и подбор упирался бы в
+    ограничение уникальности.
+    Уникальность не гарантируется: её обеспечивает ограничение
+    в базе, а вызывающий код повторяет попытку при конфликте.
+    """
+    base = slug_base(transliterate(title), max_length) or fallback
+    while True:
+        highest = queryset.filter(
+            Q(slug=base) | Q(slug__regex=rf'^{re.escape(base)}-[1-9]\d*$'),
+            slug__gte=base,
+            slug__lt=base + '.',
+        ).annotate(
+            base_taken=Exists(queryset.filter(slug=base))
+        ).order_by(Length('slug').desc(), '-slug').values_list(
+            'slug', 'base_taken'
+        ).first()
+        variant, base_taken = highest or (None, False)
+        slug = next_free_slug(base, {base, variant} if base_taken else set())
+        if len(slug) <= max_length:
+            return slug
+        overflow = len(slug) - max_length
+        base = slug_base(base, len(base) - overflow) or fallback
+
+
+class SlugBatch:
+    """
+    Подбор slug для многих заголовков сразу, при импорте.
+
+    Занятые варианты новых base выбираются из базы пачкой запросов
+    (по диапазонам, как в allocate_slug), дальше номера выдаются
+    в памяти: slug, уже выданные в этой пачке или заданные в записях
+    явно, повторно не выдаются.
+    """
+
+    # Столько диапазонов объединяется в один запрос через OR.
+    RANGES_PER_QUERY = 100
+
+    def __init__(self, queryset, max_length, fallback):
+        self.queryset = queryset
+        self.max_length = max_length
+        self.fallback = fallback
+        self.taken = {}
+        self.next_number = {}
+        self.reserved = set()
+
+    def reserve(self, slugs):
+        """Отмечает заданные явно slug как занятые."""
+        self.reserved.update(slugs)
+
+    def allocate(self, titles):
+        """Свободные slug для заголовков, в том же порядке."""
+        bases = [
+            slug_base(transliterate(title), self.max_length)
+            or self.fallback
+            for title in titles
+        ]
+        self.load(bases)
+        return [self.take(base) for base in bases]
+
+    def load(self, bases):
+        new = set(bases) - self.taken.keys()
+        for base in new:
+            self.taken[base] = set()
+        # Номер нужен только тем base, которые уже заняты целиком:
+        # их ищем одним запросом по уникальному индексу, а варианты
+        # с номерами читаем лишь для них.
+        existing = sorted(self.queryset.filter(
+            slug__in=new
+        ).values_list('slug', flat=True))
+        for start in range(0, len(existing), self.RANGES_PER_QUERY):
+            ranges = existing[start:start + self.RANGES_PER_QUERY]
+            condition = Q()
+            for base in ranges:
+                condition |= Q(slug__gte=base, slug__lt=base + '.')
+            for slug in self.queryset.filter(condition).values_list(
+                'slug', flat=True
+            ):
+                for base in ranges:
+                    if base <= slug < base + '.':
+                        self.taken[base].add(slug)
+
+    def take(self, base):
+        taken = self.taken[base]
+        if base not in taken and base not in self.reserved:
+            slug = base
+        else:
+            number = self.next_number.get(base)
+            if number is None:
+                number = int(next_free_slug(base, taken | {base})[
+                    len(base) + 1:
+                ])
+            while f'{base}-{number}' in self.reserved:
+                number += 1
+            self.next_number[base] = number + 1
+            slug = f'{base}-{number}'
+            if len(slug) > self.max_length:
+                shorter = slug_base(
+                    base, len(base) - (len(slug) - self.max_length)
+                ) or self.fallback
+                self.load([shorter])
+                return self.take(shorter)
+        self.reserved.add(slug)
+        return slug
@@ -0,0 +1,88 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from .models import Note
+from .search import get_index
+from .slugs import SlugBatch
+
+# Пароль всех созданных пользователей, чтобы под ними можно было войти.
+PASSWORD = 'synthetic'
+
+TOPICS = (
+    'Список покупок', 'План на неделю', 'Рецепт борща', 'Идеи для отпуска',
+    'Книги на лето', 'Встреча с командой', 'Подарки друзьям', 'Тренировка',
+    'Ремонт на кухне', 'Дела на даче', 'Заметки с лекции', 'Фильмы',
+)
+DETAILS = (
+    'срочно', 'на выходные', 'к пятнице', 'для мамы', 'в отпуске',
+    'после работы', 'на следующий месяц', 'черновик',
+)
+WORDS = (
+    'купить', 'позвонить', 'записать', 'молоко', 'хлеб', 'билеты',
+    'проверить', 'встреча', 'вечером', 'утром', 'завтра', 'сметана',
+    'список', 'задача', 'отчёт', 'идея', 'не забыть', 'заказать',
+)
+
+
+def note_title(rng):
+    """
+    Заголовок из небольшого словаря: заголовки часто повторяются,
+    поэтому slug с номерами подбираются так же, как у живых заметок.
+    """
+    if rng.random() < 0.5:
+        return rng.choice(TOPICS)
+    return f'{rng.choice(TOPICS)} {rng.choice(DETAILS)}'
+
+
+def note_text(rng):
+    return ', '.join(rng.choices(WORDS, k=rng.randint(5, 40))).capitalize()
+
+
+def create_users(count, batch_size):
+    """Пользователи user1..userN с общим заранее посчитанным паролем."""
+    password = make_password(PASSWORD)
+    return get_user_model().objects.bulk_create(
+        (
+            get_user_model()(username=f'user{number}', password=password)
+            for number in range(1, count + 1)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def create_notes(rng, users, per_user, batch_size):
+    """Заметки пачками: slug подбираются сразу на пачку, как при импорте."""
+    slugs = SlugBatch(
+        Note.objects.all(),
+        Note._meta.get_field('slug').max_length,
+        fallback=Note._meta.model_name,
+    )
+    index = get_index()
+    authors = [user for user in users for _ in range(per_user)]
+    for first in range(0, len(authors), batch_size):
+        notes = [
+            Note(title=note_title(rng), text=note_text(rng), author=author)
+            for author in authors[first:first + batch_size]
+        ]
+        for note, slug in zip(notes, slugs.allocate(
+            note.title for note in notes
+        )):
+            note.slug = slug
+        # Сигналы post_save при bulk_create не срабатывают.
+        index.add(Note.objects.bulk_create(notes))
+    return len(authors)
+
+
+def generate(users, notes_per_user, seed=0, batch_size=2000):
+    """
+    Синтетический набор данных для нагрузочных замеров.
+
+    Одно и то же seed на пустой базе даёт одни и те же строки.
+    Возвращает числа созданных пользователей и заметок.
+    """
+    rng = random.Random(seed)
+    created_users = create_users(users, batch_size)
+    notes = create_notes(rng, created_users, notes_per_user, batch_size)
+    return len(created_users), notes
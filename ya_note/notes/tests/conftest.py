@@ -0,0 +1,10 @@
+import pytest
+
+from notes.search import create_search_index
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Тестовая база строится без миграций: индекс поиска создаётся здесь."""
+    with django_db_blocker.unblock():
+        create_search_index()
@@ -0,0 +1,73 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+QUERY_BUDGET_DATA_SIZES = (1, 10, 50)
+# Шаги плана запроса SQLite, недопустимые для страниц: полный просмотр
+# таблицы и сортировка во временном B-дереве.
+FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+TEMP_SORT = "USE TEMP B-TREE"
+SERVICE_STATEMENTS = ("SAVEPOINT", "RELEASE", "ROLLBACK")
+
+
+class QueryBudgetMixin:
+    """
+    Проверка числа SQL-запросов на растущих объёмах данных.
+
+    Для каждого размера из sizes вызывается grow(size), который
+    доращивает данные, затем make_request(), у которого считаются
+    запросы. Проверка падает, если число запросов зависит
+    от объёма данных или превышает budget.
+    """
+
+    def assertQueryBudget(  # noqa: N802
+        self, make_request, grow, budget, sizes=QUERY_BUDGET_DATA_SIZES
+    ):
+        counts = {}
+        for size in sizes:
+            grow(size)
+            with CaptureQueriesContext(connection) as queries:
+                make_request()
+            counts[size] = len(queries)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"Число запросов растёт с объёмом данных: {counts}",
+        )
+        self.assertLessEqual(
+            counts[sizes[0]], budget,
+            f"Запросов {counts[sizes[0]]}, а бюджет {budget}",
+        )
+        return counts[sizes[0]]
+
+
+class QueryPlanMixin:
+    """Проверка планов SQL-запросов через EXPLAIN QUERY PLAN."""
+
+    def bad_plan_steps(self, sql, tables):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            steps = [row[-1] for row in cursor.fetchall()]
+        return [
+            step for step in steps
+            if TEMP_SORT in step
+            # Просмотр результата подзапроса -- не просмотр таблицы.
+            or (scan := FULL_SCAN.search(step)) and scan.group(1) in tables
+        ]
+
+    def assertIndexedQueries(self, make_request):  # noqa: N802
+        """
+        Запросы make_request() читают таблицы только по индексам
+        и не сортируют строки во временном B-дереве.
+        """
+        tables = set(connection.introspection.table_names())
+        with CaptureQueriesContext(connection) as queries:
+            make_request()
+        problems = {}
+        for query in queries:
+            if query["sql"].startswith(SERVICE_STATEMENTS):
+                continue
+            steps = self.bad_plan_steps(query["sql"], tables)
+            if steps:
+                problems[query["sql"]] = steps
+        self.assertEqual(problems, {}, "Запросы без подходящих индексов")
@@ -1,3 +1,6 @@
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from django.urls import reverse
@@ -65,3 +68,111 @@ class TestContent(TestCase):
                 self.assertIsInstance(
                     response.context["form"], NoteForm
                 ), "Форма передана, но это не форма NoteForm"
+
+
+class TestNotesListPages(TestCase):
+    """Тесты проверяют постраничный список заметок."""
+
+    PAGE_SIZE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора с несколькими страницами заметок."""
+        cls.author = User.objects.create(username="Автор заметок")
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.notes = Note.objects.bulk_create(
+            Note(
+                title=f"Заметка {index}",
+                text="Текст",
+                slug=f"note-{index}",
+                author=cls.author,
+            )
+            for index in range(cls.PAGE_SIZE * 2 + 1)
+        )
+        cls.url = reverse("notes:list")
+
+    def setUp(self):
+        page_size = self.settings(NOTES_COUNT_ON_PAGE=self.PAGE_SIZE)
+        page_size.enable()
+        self.addCleanup(page_size.disable)
+
+    def test_pages_cover_all_notes_in_order(self):
+        """
+        Проверяем, что страницы по параметру after идут по возрастанию id
+        и вместе содержат все заметки автора ровно по одному разу.
+        """
+        seen = []
+        url = self.url
+        while url:
+            response = self.author_client.get(url)
+            page = response.context["object_list"]
+            self.assertLessEqual(len(page), self.PAGE_SIZE)
+            seen.extend(note.id for note in page)
+            next_after = response.context["next_after"]
+            url = next_after and f"{self.url}?after={next_after}"
+        self.assertEqual(
+            seen, sorted(note.id for note in self.notes)
+        ), "Страницы списка пропускают или повторяют заметки"
+
+    def test_list_does_not_load_note_text(self):
+        """Проверяем, что текст заметок в списке не читается из базы."""
+        response = self.author_client.get(self.url)
+        for note in response.context["object_list"]:
+            self.assertIn("text", note.get_deferred_fields())
+
+    def test_broken_after_is_bad_request(self):
+        """
+        Проверяем, что нечисловой after, в том числе с цифрами
+        не из ASCII, даёт ответ 400.
+        """
+        for after in ("abc", "²", "-1"):
+            with self.subTest(after=after):
+                response = self.author_client.get(
+                    self.url, {"after": after}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+
+class TestAsyncNotesListPages(TestNotesListPages):
+    """Те же проверки для асинхронного списка заметок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = reverse("notes:async_list")
+
+
+class TestAsyncPages(TestCase):
+    """Тесты проверяют асинхронные страницы под ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="Автор")
+        cls.note = Note.objects.create(
+            title="Заголовок", text="Текст", author=cls.author
+        )
+
+    async def test_async_pages_match_sync(self):
+        """
+        Проверяем, что асинхронные список и заметка совпадают
+        с синхронными.
+        """
+        await self.async_client.aforce_login(self.author)
+        await sync_to_async(self.client.force_login)(self.author)
+        pages = (
+            ("notes:list", "notes:async_list", None),
+            ("notes:detail", "notes:async_detail", (self.note.slug,)),
+        )
+        for sync_name, async_name, args in pages:
+            with self.subTest(name=async_name):
+                expected = await sync_to_async(self.client.get)(
+                    reverse(sync_name, args=args)
+                )
+                response = await self.async_client.get(
+                    reverse(async_name, args=args)
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.content, expected.content)
@@ -1,12 +1,34 @@
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.db import IntegrityError, connection
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.search import (
+    MAX_WORD_LENGTH,
+    FtsIndex,
+    TermIndex,
+    get_index,
+    search_notes,
+)
+from notes.slugs import (
+    SLUG_RETRIES,
+    SlugBatch,
+    allocate_slug,
+    clear_transliteration_cache,
+    transliteration_cache_stats,
+)
 
 User = get_user_model()
 
@@ -197,3 +219,391 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(
             Note.objects.count(), note_count_before
         ), "Заметка удалена"
+
+
+class TestSlugAllocation(TestCase):
+    """Тесты проверяют подбор свободного slug по заголовку."""
+
+    TITLE = "Список покупок"
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора заметок."""
+        cls.author = User.objects.create(username="Автор заметок")
+
+    def create_note(self, title=TITLE):
+        return Note.objects.create(
+            title=title, text="Текст", author=self.author
+        )
+
+    def test_duplicate_titles_get_numbered_slugs(self):
+        """Проверяем, что одинаковые заголовки получают slug с номером."""
+        base = slugify(self.TITLE)
+        slugs = [self.create_note().slug for _ in range(4)]
+        self.assertEqual(
+            slugs, [base, f"{base}-2", f"{base}-3", f"{base}-4"]
+        ), "Slug для одинаковых заголовков подобраны неверно"
+
+    def test_slug_found_with_one_query(self):
+        """
+        Проверяем, что свободный slug ищется одним запросом,
+        сколько бы заметок с таким заголовком ни было.
+        """
+        for _ in range(5):
+            self.create_note()
+        with self.assertNumQueries(1):
+            slug = allocate_slug(
+                Note.objects.all(), self.TITLE, 100, fallback="note"
+            )
+        self.assertEqual(slug, f"{slugify(self.TITLE)}-6")
+
+    def test_slug_query_reads_one_row(self):
+        """
+        Проверяем, что при тысяче занятых вариантов запрос читает
+        одну строку, а варианты с буквами и нулями не мешают номеру.
+        """
+        base = slugify(self.TITLE)
+        slugs = [base, f"{base}-abc", f"{base}-0999", f"{base}-2x"]
+        slugs += [f"{base}-{number}" for number in range(2, 1001)]
+        Note.objects.bulk_create(
+            Note(title=self.TITLE, text="Текст", slug=slug,
+                 author=self.author)
+            for slug in slugs
+        )
+        with CaptureQueriesContext(connection) as queries:
+            slug = allocate_slug(
+                Note.objects.all(), self.TITLE, 100, fallback="note"
+            )
+        self.assertEqual(slug, f"{base}-1001")
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].endswith("LIMIT 1"))
+
+    def test_free_base_reused(self):
+        """Проверяем, что освободившийся slug без номера выдаётся снова."""
+        first, second = self.create_note(), self.create_note()
+        first.delete()
+        self.assertEqual(self.create_note().slug, first.slug)
+        self.assertEqual(self.create_note().slug, f"{second.slug[:-2]}-3")
+
+    def test_batch_slugs_skip_taken_and_reserved(self):
+        """
+        Проверяем, что slug для пачки заголовков подбираются двумя
+        запросами и не совпадают с занятыми и заданными явно.
+        """
+        for _ in range(2):
+            self.create_note()
+        base = slugify(self.TITLE)
+        batch = SlugBatch(Note.objects.all(), 100, fallback="note")
+        batch.reserve([f"{base}-4"])
+        with self.assertNumQueries(2):
+            slugs = batch.allocate(
+                [self.TITLE, self.TITLE, "Другое", self.TITLE]
+            )
+        self.assertEqual(slugs, [
+            f"{base}-3", f"{base}-5", slugify("Другое"), f"{base}-6"
+        ])
+
+    def test_repeated_title_transliterated_once(self):
+        """
+        Проверяем, что повторный заголовок берётся из кэша
+        транслитерации, а счётчики кэша это отражают.
+        """
+        clear_transliteration_cache()
+        for _ in range(3):
+            self.create_note()
+        stats = transliteration_cache_stats()
+        self.assertEqual(
+            (stats["misses"], stats["hits"]), (1, 2)
+        ), "Повторный заголовок транслитерирован заново"
+        self.assertEqual(stats["size"], 1)
+
+    def test_cache_size_read_from_current_settings(self):
+        """
+        Проверяем, что размер кэша берётся из настроек при создании
+        кэша, а не при импорте модуля.
+        """
+        self.addCleanup(clear_transliteration_cache)
+        with self.settings(NOTES_SLUGIFY_CACHE_SIZE=2):
+            clear_transliteration_cache()
+            self.assertEqual(transliteration_cache_stats()["maxsize"], 2)
+
+    def test_long_slug_with_suffix_fits_field(self):
+        """Проверяем, что slug с номером не длиннее поля."""
+        title = "Очень длинный заголовок " * 10
+        first, second = self.create_note(title), self.create_note(title)
+        self.assertEqual(first.slug, slugify(title)[:100].rstrip("-"))
+        self.assertLessEqual(len(second.slug), 100)
+        self.assertNotEqual(first.slug, second.slug)
+
+    def test_truncated_slug_has_no_trailing_dash(self):
+        """
+        Проверяем, что slug, обрезанный по дефису, не кончается
+        дефисом и номер не добавляется через два дефиса.
+        """
+        title = "a" * 99 + " b"
+        first, second = self.create_note(title), self.create_note(title)
+        self.assertEqual(first.slug, "a" * 99)
+        self.assertNotIn("--", second.slug)
+        self.assertLessEqual(len(second.slug), 100)
+
+    def test_save_retries_when_slug_taken_concurrently(self):
+        """
+        Проверяем, что если подобранный slug успели занять,
+        заметка сохраняется со следующим свободным.
+        """
+        taken = self.create_note().slug
+        with mock.patch(
+            "notes.models.allocate_slug",
+            side_effect=[taken, f"{taken}-2"],
+        ):
+            note = self.create_note()
+        self.assertEqual(note.slug, f"{taken}-2")
+
+    def test_save_gives_up_after_retries(self):
+        """Проверяем, что число повторных попыток ограничено."""
+        taken = self.create_note().slug
+        with mock.patch(
+            "notes.models.allocate_slug", return_value=taken
+        ) as allocate, self.assertRaises(IntegrityError):
+            self.create_note()
+        self.assertEqual(allocate.call_count, SLUG_RETRIES)
+
+    def test_form_without_slug_does_not_reject_duplicate_title(self):
+        """
+        Проверяем, что форма без slug не отклоняет заметку
+        с уже занятым заголовком, а подбирает новый slug.
+        """
+        self.create_note()
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse("notes:add"), data={"title": self.TITLE, "text": "Ещё"}
+        )
+        self.assertRedirects(response, reverse("notes:success"))
+        self.assertEqual(
+            Note.objects.latest("id").slug, f"{slugify(self.TITLE)}-2"
+        )
+
+
+class TestNotesImportExport(TestCase):
+    """Тесты проверяют выгрузку и загрузку заметок командами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора с заметками, одна из них с заданным slug."""
+        cls.author = User.objects.create(username="Автор заметок")
+        Note.objects.create(
+            title="Рецепт", text="Борщ со сметаной", author=cls.author
+        )
+        Note.objects.create(
+            title="Рецепт", text="Щи", slug="shchi", author=cls.author
+        )
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_export_import_round_trip(self):
+        """
+        Проверяем, что выгруженные заметки загружаются обратно
+        без потерь и находятся поиском.
+        """
+        fields = ("id", "title", "text", "slug", "author")
+        expected = list(Note.objects.values_list(*fields))
+        for extension in ("jsonl", "csv"):
+            with self.subTest(extension=extension):
+                path = Path(self.directory.name) / f"notes.{extension}"
+                call_command("export_notes", path, stdout=StringIO())
+                Note.objects.all().delete()
+                call_command(
+                    "import_notes", path, batch_size=1, stdout=StringIO()
+                )
+                self.assertEqual(
+                    list(Note.objects.values_list(*fields)), expected
+                )
+                found = search_notes(self.author, "сметаной", limit=10)
+                self.assertEqual(
+                    [note.title for note in found], ["Рецепт"]
+                ), "Загруженная заметка не попала в индекс"
+
+    def test_import_generates_free_slugs(self):
+        """Проверяем, что загруженные заметки без slug получают свободные."""
+        path = Path(self.directory.name) / "notes.jsonl"
+        path.write_text(
+            '{"author": "Автор заметок", "title": "Рецепт", "text": "1"}\n'
+            '{"author": "Автор заметок", "title": "Рецепт", "text": "2"}\n',
+            encoding="utf-8",
+        )
+        call_command("import_notes", path, stdout=StringIO())
+        base = slugify("Рецепт")
+        self.assertEqual(
+            list(Note.objects.order_by("id").values_list("slug", flat=True)),
+            [base, "shchi", f"{base}-2", f"{base}-3"],
+        )
+
+    def test_import_is_atomic(self):
+        """Проверяем, что ошибка в записи отменяет весь импорт."""
+        path = Path(self.directory.name) / "notes.csv"
+        path.write_text(
+            "author,title,text\n"
+            "Автор заметок,Первая,Текст\n"
+            "Никто,Вторая,Текст\n",
+            encoding="utf-8",
+        )
+        with self.assertRaisesRegex(CommandError, "запись 2"):
+            call_command("import_notes", path, batch_size=1)
+        self.assertEqual(Note.objects.count(), 2)
+
+
+class TestGenerateDataset(TestCase):
+    """Тесты проверяют заполнение базы синтетическими заметками."""
+
+    options = {"users": 3, "notes_per_user": 20, "batch_size": 7}
+
+    def generate(self):
+        call_command(
+            "generate_dataset", seed=1, stdout=StringIO(), **self.options
+        )
+        return list(Note.objects.order_by("id").values_list(
+            "title", "text", "slug", "author__username"
+        ))
+
+    def test_dataset_is_deterministic(self):
+        """Проверяем, что при том же seed создаются те же заметки."""
+        notes = self.generate()
+        self.assertEqual(len(notes), 60)
+        titles = [title for title, *_ in notes]
+        self.assertLess(
+            len(set(titles)), len(titles), "Заголовки не повторяются"
+        )
+        User.objects.all().delete()
+        self.assertEqual(self.generate(), notes)
+
+    def test_notes_are_searchable(self):
+        """Проверяем, что созданные заметки попали в поисковый индекс."""
+        self.generate()
+        author = User.objects.get(username="user1")
+        note = Note.objects.filter(author=author).first()
+        word = note.text.split(",")[0].split()[0]
+        self.assertIn(note, search_notes(author, word, limit=100))
+
+    def test_generation_is_atomic(self):
+        """Проверяем, что неудачный запуск не оставляет данных."""
+        notes = self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.assertEqual(Note.objects.count(), len(notes))
+
+
+class TestNoteSearch(TestCase):
+    """Тесты проверяют поиск по заметкам и обновление индекса."""
+
+    index_class = FtsIndex
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора, его клиент и заметку другого пользователя."""
+        cls.author = User.objects.create(username="Автор заметок")
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader = User.objects.create(username="Читатель простой")
+        Note.objects.create(
+            title="Ёлка", text="Чужая ёлка", author=cls.reader
+        )
+
+    def setUp(self):
+        self.assertIsInstance(get_index(), self.index_class)
+
+    def search(self, query):
+        return [note.title for note in search_notes(self.author, query, 10)]
+
+    def test_created_note_found_by_title_and_text(self):
+        """
+        Проверяем, что новая заметка сразу находится по словам
+        заголовка и текста без учёта регистра и «ё».
+        """
+        self.author_client.post(
+            reverse("notes:add"),
+            {"title": "Ёлка", "text": "Купить ИГРУШКИ и гирлянду"},
+        )
+        for query in ("елка", "ЁЛКА", "игрушки гирлянду"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), ["Ёлка"])
+        self.assertEqual(self.search("елка мандарины"), [])
+
+    def test_updated_and_deleted_notes_reindexed(self):
+        """Проверяем, что правка и удаление заметки обновляют индекс."""
+        note = Note.objects.create(
+            title="Покупки", text="Хлеб", author=self.author
+        )
+        self.author_client.post(
+            reverse("notes:edit", args=(note.slug,)),
+            {"title": "Покупки", "text": "Молоко", "slug": note.slug},
+        )
+        self.assertEqual(self.search("хлеб"), [])
+        self.assertEqual(self.search("молоко"), ["Покупки"])
+        self.author_client.post(reverse("notes:delete", args=(note.slug,)))
+        self.assertEqual(self.search("покупки"), [])
+
+    def test_search_page_shows_only_own_notes(self):
+        """Проверяем, что на странице поиска нет чужих заметок."""
+        own = Note.objects.create(
+            title="Ёлка", text="Своя", author=self.author
+        )
+        response = self.author_client.get(
+            reverse("notes:search"), {"q": "ёлка"}
+        )
+        self.assertEqual(list(response.context["object_list"]), [own])
+
+    def test_rebuild_indexes_existing_notes(self):
+        """Проверяем, что команда индексирует заметки, созданные в обход."""
+        Note.objects.bulk_create([
+            Note(title="Черновик", text="Текст", slug="draft",
+                 author=self.author),
+        ])
+        self.assertEqual(self.search("черновик"), [])
+        call_command("rebuild_search_index", batch_size=1, stdout=StringIO())
+        self.assertEqual(self.search("черновик"), ["Черновик"])
+
+    def test_overlong_words_not_indexed(self):
+        """
+        Проверяем, что слово длиннее MAX_WORD_LENGTH не ломает
+        сохранение заметки и не участвует в поиске.
+        """
+        word = "а" * (MAX_WORD_LENGTH + 1)
+        Note.objects.create(
+            title="Ссылка", text=f"Адрес {word}", author=self.author
+        )
+        self.assertEqual(self.search("адрес"), ["Ссылка"])
+        self.assertEqual(self.search(word), [])
+
+    def test_note_not_saved_when_indexing_fails(self):
+        """
+        Проверяем, что ошибка индекса отменяет создание и правку
+        заметки, в том числе с заданным slug.
+        """
+        note = Note.objects.create(
+            title="Покупки", text="Хлеб", author=self.author
+        )
+        with mock.patch.object(
+            self.index_class, "add", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                Note.objects.create(
+                    title="Ёлка", text="Своя", slug="holiday",
+                    author=self.author,
+                )
+            note.text = "Молоко"
+            with self.assertRaises(RuntimeError):
+                note.save()
+        self.assertFalse(Note.objects.filter(slug="holiday").exists())
+        note.refresh_from_db()
+        self.assertEqual(note.text, "Хлеб")
+        self.assertEqual(self.search("хлеб"), ["Покупки"])
+
+
+@override_settings(NOTES_SEARCH_FTS=False)
+class TestNoteSearchWithoutFts(TestNoteSearch):
+    """Те же тесты поиска на запасном индексе без FTS5."""
+
+    index_class = TermIndex
@@ -0,0 +1,152 @@
+from itertools import count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth import get_user_model
+from django.db.utils import ConnectionHandler
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import rebuild_index
+from notes.tests.mixins import QueryBudgetMixin, QueryPlanMixin
+from notes.urls import app_name, urlpatterns
+from yanote import settings_production
+
+User = get_user_model()
+
+# Бюджет запросов для каждого именованного маршрута приложения notes:
+# (нужен ли slug заметки, наибольшее допустимое число запросов).
+ROUTE_BUDGETS = {
+    "notes:home": (False, 2),
+    "notes:add": (False, 2),
+    "notes:edit": (True, 3),
+    "notes:detail": (True, 3),
+    "notes:delete": (True, 3),
+    "notes:list": (False, 3),
+    "notes:success": (False, 2),
+    "notes:search": (False, 4),
+    "notes:async_list": (False, 3),
+    "notes:async_detail": (True, 3),
+}
+# Строки запроса для маршрутов, которым нужны GET-параметры.
+ROUTE_QUERIES = {
+    "notes:search": "?q=заметка",
+}
+
+
+class TestQueryBudget(QueryBudgetMixin, QueryPlanMixin, TestCase):
+    """Тесты проверяют, что число запросов страниц не растёт с данными."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создаём автора, его клиент и заметку."""
+        cls.author = User.objects.create(username="Лев Толстой")
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title="Заголовок", text="Текст", slug="slug", author=cls.author
+        )
+
+    def setUp(self):
+        self.steps = count()
+
+    def grow(self, size):
+        """
+        Доращиваем данные: size заметок автора
+        и size других пользователей с заметками,
+        все заметки попадают в поисковый индекс.
+        """
+        step = next(self.steps)
+        users = User.objects.bulk_create(
+            User(username=f"Читатель {step}-{i}") for i in range(size)
+        )
+        Note.objects.bulk_create(
+            [
+                Note(
+                    title=f"Заметка {step}-{i}", text="Текст",
+                    slug=f"note-{step}-{i}", author=self.author,
+                )
+                for i in range(size)
+            ] + [
+                Note(
+                    title="Чужая заметка", text="Текст",
+                    slug=f"other-{step}-{i}", author=user,
+                )
+                for i, user in enumerate(users)
+            ]
+        )
+        rebuild_index()
+
+    def test_every_route_has_query_budget(self):
+        """Проверяем, что бюджет запросов объявлен для каждого маршрута."""
+        route_names = {
+            f"{app_name}:{pattern.name}" for pattern in urlpatterns
+        }
+        self.assertEqual(
+            route_names, set(ROUTE_BUDGETS),
+            "Бюджет запросов объявлен не для всех маршрутов notes",
+        )
+
+    def test_route_query_budget(self):
+        """
+        Проверяем, что число запросов каждой страницы не растёт
+        вместе с объёмом данных и укладывается в бюджет.
+        """
+        for name, (with_slug, budget) in ROUTE_BUDGETS.items():
+            with self.subTest(name=name):
+                args = (self.note.slug,) if with_slug else None
+                url = reverse(name, args=args) + ROUTE_QUERIES.get(name, "")
+                self.assertQueryBudget(
+                    lambda: self.author_client.get(url), self.grow, budget
+                )
+
+    def test_route_query_plans(self):
+        """
+        Проверяем, что запросы каждой страницы читают таблицы
+        по индексам и не сортируют строки во временном B-дереве.
+        """
+        self.grow(10)
+        for name, (with_slug, _) in ROUTE_BUDGETS.items():
+            with self.subTest(name=name):
+                args = (self.note.slug,) if with_slug else None
+                url = reverse(name, args=args) + ROUTE_QUERIES.get(name, "")
+                self.assertIndexedQueries(lambda: self.author_client.get(url))
+
+    @override_settings(NOTES_SEARCH_FTS=False)
+    def test_search_query_plans_without_fts(self):
+        """Проверяем планы запросов поиска на запасном индексе."""
+        self.grow(10)
+        url = reverse("notes:search") + ROUTE_QUERIES["notes:search"]
+        self.assertIndexedQueries(lambda: self.author_client.get(url))
+
+
+class TestProductionProfile(TestCase):
+    """Тест проверяет настройки базы профиля settings_production."""
+
+    def test_production_profile_pragmas(self):
+        """
+        Проверяем, что профиль settings_production включает при
+        подключении WAL, synchronous=NORMAL и ожидание блокировки.
+        """
+        with TemporaryDirectory() as directory:
+            databases = ConnectionHandler({
+                "default": {
+                    **settings_production.DATABASES["default"],
+                    "NAME": Path(directory) / "db.sqlite3",
+                }
+            })
+            database = databases["default"]
+            try:
+                with database.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in (
+                        "journal_mode", "synchronous", "busy_timeout"
+                    ):
+                        cursor.execute(f"PRAGMA {pragma}")
+                        pragmas[pragma] = cursor.fetchone()[0]
+            finally:
+                database.close()
+        self.assertEqual(pragmas, {
+            "journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000
+        }, "Прагмы профиля settings_production не применены")
@@ -62,6 +62,8 @@ class TestRoutes(TestCase):
             "notes:list",
             "notes:success",
             "notes:add",
+            "notes:search",
+            "notes:async_list",
         )
         for name in urls:
             with self.subTest(name=name):
@@ -81,7 +83,10 @@ class TestRoutes(TestCase):
             (self.reader_client, HTTPStatus.NOT_FOUND),
         )
         for user, status in users_statuses:
-            for name in ("notes:edit", "notes:delete", "notes:detail"):
+            for name in (
+                "notes:edit", "notes:delete", "notes:detail",
+                "notes:async_detail",
+            ):
                 with self.subTest(user=user, name=name):
                     url = reverse(name, args=(self.note.slug,))
                     response = user.get(url)
@@ -96,7 +101,10 @@ class TestRoutes(TestCase):
             ("notes:list", None),
             ("notes:add", None),
             ("notes:success", None),
+            ("notes:search", None),
+            ("notes:async_list", None),
             ("notes:detail", (self.note.slug,)),
+            ("notes:async_detail", (self.note.slug,)),
             ("notes:edit", (self.note.slug,)),
             ("notes:delete", (self.note.slug,)),
         )
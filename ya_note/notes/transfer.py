@@ -0,0 +1,205 @@
+import csv
+import json
+import sys
+from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+FORMATS = ('jsonl', 'csv')
+BATCH_SIZE = 2000
+
+
+def detect_format(path, format=None):
+    """Формат из параметра --format или из расширения файла."""
+    if format:
+        return format
+    suffix = Path(path).suffix.lstrip('.')
+    if suffix in FORMATS:
+        return suffix
+    raise CommandError(
+        f'Не удалось определить формат файла {path}, укажите --format'
+    )
+
+
+def read_records(stream, format):
+    """Записи файла по одной: словари полей, пустые строки пропускаются."""
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_records(stream, format, fields, rows):
+    """Записывает строки rows (кортежи значений fields), возвращает число."""
+    total = 0
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        for total, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return total
+    for total, row in enumerate(rows, 1):
+        # Даты -- как str(): в CSV они такие же, и микросекунды
+        # времени комментария не теряются.
+        line = json.dumps(dict(zip(fields, row)), ensure_ascii=False,
+                          default=str)
+        stream.write(line + '\n')
+    return total
+
+
+def chunked(records, size):
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+@contextmanager
+def open_stream(path, mode, standard):
+    """Файл в UTF-8 или поток standard, если путь -- «-»."""
+    if path == '-':
+        yield standard
+        return
+    with open(path, mode, encoding='utf-8', newline='') as stream:
+        yield stream
+
+
+class ImportCommand(BaseCommand, metaclass=ABCMeta):
+    """
+    Основа команд импорта: файл читается потоком и сохраняется
+    пачками через bulk_create.
+
+    Потомки задают model и fields (допустимые поля записи) и
+    определяют import_batch(). По умолчанию весь файл загружается
+    в одной транзакции: ошибка в любой строке отменяет импорт целиком,
+    но и блокировка записи в SQLite держится весь импорт. С
+    --commit-batches каждая пачка сохраняется своей транзакцией,
+    а прерванный импорт продолжают с --skip.
+    """
+    model = None
+    fields = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSONL или CSV, «-» -- stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько записей сохранять за один запрос.',
+        )
+        parser.add_argument(
+            '--commit-batches',
+            action='store_true',
+            help='Сохранять каждую пачку своей транзакцией: при ошибке '
+                 'загруженные пачки остаются в базе.',
+        )
+        parser.add_argument(
+            '--skip',
+            type=int,
+            default=0,
+            help='Пропустить первые записи файла: так продолжают импорт, '
+                 'прерванный с --commit-batches.',
+        )
+
+    def handle(self, *args, path, format, batch_size, commit_batches, skip,
+               **options):
+        format = 'jsonl' if path == '-' and not format else format
+        format = detect_format(path, format)
+        loaded = 0
+        try:
+            with open_stream(path, 'r', sys.stdin) as stream:
+                records = islice(read_records(stream, format), skip, None)
+                with nullcontext() if commit_batches else transaction.atomic():
+                    for batch in chunked(records, batch_size):
+                        with transaction.atomic():
+                            self.import_batch(
+                                batch, first_line=skip + loaded + 1
+                            )
+                        loaded += len(batch)
+        except (ValueError, KeyError, ValidationError, IntegrityError) as e:
+            if commit_batches and loaded:
+                raise CommandError(
+                    f'Импорт остановлен: {e}. Загружено записей: {loaded}, '
+                    f'продолжить: --skip {skip + loaded}'
+                )
+            raise CommandError(f'Импорт отменён: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Загружено записей: {loaded}'))
+
+    @abstractmethod
+    def import_batch(self, records, first_line):
+        """
+        Строит объекты по записям пачки и сохраняет их; first_line --
+        номер первой записи пачки в файле, для сообщений об ошибках.
+        """
+
+    def build(self, records, first_line, exclude=()):
+        """
+        Объекты self.model по записям с проверкой значений полей.
+
+        Пустые значения (пустые ячейки CSV) считаются отсутствующими.
+        Внешние ключи из exclude не проверяются запросом на каждую
+        строку: их целостность проверяет база при сохранении.
+        """
+        objects = []
+        for line, record in enumerate(records, first_line):
+            fields = {
+                name: value for name, value in record.items()
+                if value not in ('', None)
+            }
+            unknown = fields.keys() - set(self.fields)
+            if unknown:
+                raise ValueError(
+                    f'запись {line}: неизвестные поля {sorted(unknown)}'
+                )
+            obj = self.model(**fields)
+            try:
+                obj.clean_fields(exclude=exclude)
+            except ValidationError as e:
+                raise ValidationError(f'запись {line}: {e.messages}')
+            objects.append(obj)
+        return objects
+
+
+class ExportCommand(BaseCommand, metaclass=ABCMeta):
+    """
+    Основа команд экспорта: строки читаются итератором пачками
+    по chunk_size, поэтому память не растёт с размером таблицы.
+
+    Потомки задают fields и get_rows(): queryset.values_list(*fields).
+    """
+    fields = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл JSONL или CSV, по умолчанию stdout.',
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк читать из базы за один раз.',
+        )
+
+    def handle(self, *args, path, format, batch_size, **options):
+        format = 'jsonl' if path == '-' and not format else format
+        format = detect_format(path, format)
+        rows = self.get_rows().iterator(chunk_size=batch_size)
+        with open_stream(path, 'w', self.stdout) as stream:
+            total = write_records(stream, format, self.fields, rows)
+        if path != '-':
+            self.stdout.write(
+                self.style.SUCCESS(f'Выгружено записей: {total}')
+            )
+
+    @abstractmethod
+    def get_rows(self):
+        """Queryset строк для выгрузки: values_list(*fields) по порядку."""
@@ -11,5 +11,12 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('async/notes/', views.AsyncNotesList.as_view(), name='async_list'),
+    path(
+        'async/note/<slug:slug>/',
+        views.AsyncNoteDetail.as_view(),
+        name='async_detail'
+    ),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
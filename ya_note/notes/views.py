@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import BadRequest
+from django.shortcuts import aget_object_or_404, render
 from django.urls import reverse_lazy
 from django.views import generic
 
 from .forms import NoteForm
 from .models import Note
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -50,10 +55,113 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя по страницам.
+
+    Страницы идут по возрастанию id: следующая начинается после
+    последней заметки предыдущей (параметр after), поэтому запрос
+    не зависит от номера страницы и не считает все заметки автора.
+    Текст заметок в списке не нужен и из базы не читается.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        return notes_page(
+            super().get_queryset(), self.request.GET.get('after'),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+
+    def get_context_data(self, **kwargs):
+        notes, next_after = split_page(
+            list(self.object_list), settings.NOTES_COUNT_ON_PAGE
+        )
+        return super().get_context_data(
+            object_list=notes, next_after=next_after, **kwargs
+        )
+
+
+def notes_page(queryset, after, page_size):
+    """Запрос страницы заметок, начинающейся после заметки с id after."""
+    queryset = queryset.only('id', 'title', 'slug').order_by('id')
+    if after is not None:
+        # isdigit() пропускает и «²», на котором int() падает.
+        if not (after.isascii() and after.isdigit()):
+            raise BadRequest('Некорректный параметр after')
+        queryset = queryset.filter(id__gt=after)
+    # Лишняя заметка показывает, что есть следующая страница.
+    return queryset[:page_size + 1]
+
+
+def split_page(notes, page_size):
+    """Заметки страницы и id, после которого начнётся следующая."""
+    if len(notes) > page_size:
+        return notes[:page_size], notes[page_size - 1].id
+    return notes, None
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заголовкам и текстам заметок пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            limit=settings.NOTES_COUNT_ON_PAGE,
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            query=self.request.GET.get('q', ''), **kwargs
+        )
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class AsyncNoteView(generic.View):
+    """
+    Основа асинхронных страниц заметок для работы под ASGI-сервером.
+
+    Пользователь загружается через асинхронный API, анонимный
+    отправляется на страницу входа, как в LoginRequiredMixin.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncNotesList(AsyncNoteView):
+    """Асинхронный вариант NotesList."""
+
+    async def get(self, request):
+        queryset = notes_page(
+            Note.objects.filter(author=request.user),
+            request.GET.get('after'),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+        notes, next_after = split_page(
+            [note async for note in queryset], settings.NOTES_COUNT_ON_PAGE
+        )
+        return render(request, NotesList.template_name, {
+            'object_list': notes,
+            'note_list': notes,
+            'next_after': next_after,
+        })
+
+
+class AsyncNoteDetail(AsyncNoteView):
+    """Асинхронный вариант NoteDetail."""
+
+    async def get(self, request, slug):
+        note = await aget_object_or_404(
+            Note, slug=slug, author=request.user
+        )
+        return render(request, NoteDetail.template_name, {
+            'object': note, 'note': note,
+        })
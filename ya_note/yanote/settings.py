@@ -87,3 +87,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+
+NOTES_SLUGIFY_CACHE_SIZE = 4096
+
+# Искать заметки через SQLite FTS5, если библиотека собрана с ним.
+# После переключения индекс нужно перестроить: rebuild_search_index.
+NOTES_SEARCH_FTS = True
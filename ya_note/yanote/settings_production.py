@@ -0,0 +1,32 @@
+"""
+Настройки базы данных для работы под нагрузкой.
+
+Подключаются через DJANGO_SETTINGS_MODULE=yanote.settings_production,
+всё остальное совпадает с yanote.settings.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA cache_size = -65536',
+    'PRAGMA temp_store = MEMORY',
+)
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRAGMAS),
+            'timeout': 5,
+            # Блокировка записи берётся сразу при BEGIN, и параллельные
+            # сохранения заметок ждут очереди, а не падают.
+            # Параметр появился в Django 5.1.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
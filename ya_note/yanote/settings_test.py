@@ -0,0 +1,41 @@
+"""
+Настройки тестов: база в памяти без миграций, быстрый хэшер паролей,
+только нужные тестам middleware и кэш шаблонов.
+
+Подключаются через DJANGO_SETTINGS_MODULE=yanote.settings_test.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES, MIDDLEWARE, TEMPLATES
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'NAME': ':memory:',
+        'TEST': {'MIGRATE': False},
+    }
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+MIDDLEWARE = [
+    name for name in MIDDLEWARE
+    if name not in (
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    )
+]
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]